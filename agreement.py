@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from validated_results import latest_votes
+
+
+# Entry of the vote matrix for a row a labeler did not upload
+MISSING_VOTE = -1
+
+
+def vote_matrix(results):
+    """
+    Arrange the validated results into a row × annotator matrix.
+
+    Each labeler's most recent upload provides their vote on every row it contains.
+
+    Args:
+        results (pd.DataFrame): Snapshot rows, as returned by validated_results.load_results
+
+    Returns:
+        tuple: (rows, annotators, votes) where rows is a DataFrame with the id and dataset
+            columns of every row, annotators the list of labelers and votes an int8 array
+            of shape (rows, annotators) holding 1 (validated), 0 (not validated) or
+            MISSING_VOTE
+    """
+    votes = latest_votes(results)
+    row_codes, ids = pd.factorize(votes["id"], sort=True)
+    user_codes, annotators = pd.factorize(votes["user"], sort=True)
+
+    matrix = np.full((len(ids), len(annotators)), MISSING_VOTE, dtype=np.int8)
+    matrix[row_codes, user_codes] = votes["is_validated"].to_numpy(dtype=np.int8)
+
+    rows = votes.drop_duplicates("id", keep="last").set_index("id").loc[ids]
+    rows = rows.drop(columns=["is_validated", "user", "timestamp", "source"]).reset_index()
+    return rows, list(annotators), matrix
+
+
+def cohen_kappa_matrix(matrix):
+    """
+    Compute Cohen's kappa of every pair of annotators over the rows both of them rated.
+
+    Args:
+        matrix (np.ndarray): The vote matrix, see vote_matrix
+
+    Returns:
+        np.ndarray: Symmetric (annotators, annotators) array of kappas, NaN where a pair
+            shares no rows or expected agreement is already perfect
+    """
+    rated = (matrix != MISSING_VOTE).astype(np.float64)
+    yes = (matrix == 1).astype(np.float64)
+    no = (matrix == 0).astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shared = rated.T @ rated
+        observed = (yes.T @ yes + no.T @ no) / shared
+        # Rate of validations of the first and of the second annotator on the shared rows
+        first_yes = (yes.T @ rated) / shared
+        second_yes = (rated.T @ yes) / shared
+        expected = first_yes * second_yes + (1 - first_yes) * (1 - second_yes)
+        kappa = (observed - expected) / (1 - expected)
+    kappa[~np.isfinite(kappa)] = np.nan
+    return kappa
+
+
+def row_agreement(matrix):
+    """Return the share of agreeing rater pairs of every row (NaN for rows with fewer than two raters)."""
+    yes = (matrix == 1).sum(axis=1).astype(np.float64)
+    raters = (matrix != MISSING_VOTE).sum(axis=1).astype(np.float64)
+    no = raters - yes
+    with np.errstate(divide="ignore", invalid="ignore"):
+        agreement = (yes * (yes - 1) + no * (no - 1)) / (raters * (raters - 1))
+    agreement[raters < 2] = np.nan
+    return agreement
+
+
+def fleiss_kappa(matrix):
+    """
+    Compute Fleiss' kappa over the rows rated by at least two annotators.
+
+    Rows may have different numbers of raters: each row's agreement is the share of
+    agreeing rater pairs and category proportions are pooled over every rating.
+
+    Args:
+        matrix (np.ndarray): The vote matrix, see vote_matrix
+
+    Returns:
+        float: The kappa, NaN if no row has two raters or every rating is the same
+    """
+    per_row = row_agreement(matrix)
+    rated = ~np.isnan(per_row)
+    if not rated.any():
+        return float("nan")
+
+    yes = (matrix[rated] == 1).sum(axis=1)
+    raters = (matrix[rated] != MISSING_VOTE).sum(axis=1)
+    p_yes = yes.sum() / raters.sum()
+    expected = p_yes ** 2 + (1 - p_yes) ** 2
+    if expected == 1:
+        return float("nan")
+    return float((per_row[rated].mean() - expected) / (1 - expected))
+
+
+def agreement_report(results):
+    """
+    Compute the inter-annotator agreement of a set of validated results.
+
+    Args:
+        results (pd.DataFrame): Snapshot rows, as returned by validated_results.load_results
+
+    Returns:
+        dict: annotators, rows, rows rated by several annotators, Fleiss' kappa, the
+            pairwise Cohen's kappas (DataFrame), agreement per group_id (DataFrame) and
+            disagreement rate per label (DataFrame, None if the rows have no label)
+    """
+    rows, annotators, matrix = vote_matrix(results)
+    per_row = row_agreement(matrix)
+    shared = ~np.isnan(per_row)
+    yes = (matrix == 1).sum(axis=1)
+    raters = (matrix != MISSING_VOTE).sum(axis=1)
+    disagreement = pd.Series((yes > 0) & (yes < raters), index=rows.index)[shared]
+
+    stats = rows.loc[shared].assign(agreement=per_row[shared], disagreement=disagreement)
+    groups = (
+        stats.groupby("group_id", observed=True)
+        .agg(rows=("agreement", "size"), agreement=("agreement", "mean"), disagreement=("disagreement", "mean"))
+        .sort_values("agreement")
+    )
+    labels = None
+    if "label" in stats.columns:
+        labels = stats.groupby("label", observed=True).agg(
+            rows=("disagreement", "size"), disagreement=("disagreement", "mean")
+        )
+
+    return {
+        "annotators": annotators,
+        "rows": len(rows),
+        "shared_rows": int(shared.sum()),
+        "fleiss_kappa": fleiss_kappa(matrix),
+        "cohen_kappa": pd.DataFrame(cohen_kappa_matrix(matrix), index=annotators, columns=annotators),
+        "groups": groups,
+        "labels": labels,
+    }
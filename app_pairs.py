@@ -1,67 +1,135 @@
 import streamlit as st
+
+# Set page config before the heavier imports below, so the page renders right away
+st.set_page_config(
+    page_title="Data Labeling (Pairs)",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.title("Data Labeling (Pairs)")
+
+import html
 import json
-import pandas as pd
-import boto3
 import os
 import json
-from rich import print
-from data_s3_manager import S3Manager
+from results_export import (
+    COMPRESSIONS, ExportCache, compress_chunks, iter_csv_chunks, iter_validated_json_chunks, upload_multipart
+)
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from dataset_cache import dataset_cache
+from s3_client import LazyS3Client
+from tracing import tracer
+# pandas, numpy and the modules that need them are imported where first used, so a fresh
+# server renders the page without waiting for them
 
 
 aws = st.secrets["aws"]
 
-session = boto3.Session(
+# Shared with every rerun and session of this server, created on the first S3 request
+s3 = LazyS3Client(
     aws_access_key_id=aws["AWS_ACCESS_KEY_ID"],
     aws_secret_access_key=aws["AWS_SECRET_ACCESS_KEY"],
     region_name=aws["AWS_REGION"],
 )
-s3 = session.client("s3")
 
 bucket_name = aws["bucket_name"]
 prefix = aws["prefix"]
+# "parquet" or "jsonl" page the dataset from S3 with byte-range GETs (see `data_s3_manager.py convert`)
+dataset_format = aws.get("dataset_format", "json")
+dataset_name = "assembled_data_pairs"
+
+# Compression ("gzip", "zstd" or "none"), part size and parallel parts of result uploads
+upload_compression = aws.get("upload_compression", "gzip")
+upload_part_size = int(aws.get("upload_part_size_mb", 8)) * 1024 * 1024
+upload_max_concurrency = int(aws.get("upload_max_concurrency", 4))
+
+# Opt-in: load the dataset on a background thread when the server starts, so the first
+# "Download data" is a cache hit (JSON datasets only; paged formats load just one page)
+if aws.get("warm_up", False) and dataset_format == "json":
+    from dataset_io import PAIRS_COLUMNS
+
+    dataset_cache.warm_up(s3, bucket_name, f"{prefix}{dataset_name}.json", PAIRS_COLUMNS)
+
+# Show the hot-path timing percentiles in the sidebar
+show_timings = aws.get("show_timings", False)
+# Show the validation overlay of every live session in the sidebar (for admins)
+show_sessions = aws.get("show_sessions", False)
+
+# Seconds between autosaves of validation changes to S3
+AUTOSAVE_INTERVAL_SECONDS = 5
+
+ROWS_PER_PAGE = 5
+# Page sizes of the grid view, which renders a whole page as a single element
+GRID_PAGE_SIZES = [100, 200, 500]
+# Search box choices and the index field each one looks up
+SEARCH_FIELDS = {"ID": "id", "Group ID": "group_id", "Sentence words": "text"}
+
+def read_frame_from_s3(s3, bucket_name, s3_key, columns):
+    """Stream the records of a JSON dataset from S3 into a DataFrame holding only the given columns"""
+    from rich import print
 
-def read_json_from_s3(s3, bucket_name, s3_key) -> dict:
-    """Read a JSON object directly from S3 without saving to a file"""
     try:
-        response = s3.get_object(Bucket=bucket_name, Key=s3_key)
-        content = response['Body'].read().decode('utf-8')
-        json_obj = json.loads(content)
-        print(f"✅ Successfully read JSON from s3://{bucket_name}/{s3_key}")
-        return json_obj
+        df = dataset_cache.get_frame(s3, bucket_name, s3_key, columns)
+        print(f"✅ Successfully read {len(df)} records from s3://{bucket_name}/{s3_key}")
+        return df
+    except ValueError as e:
+        st.error(f"Unsupported JSON format: {str(e)}")
+        return None
     except Exception as e:
         print(f"❌ Error reading JSON from S3: {str(e)}")
         return None
 
 
+def load_dataset(s3, bucket_name, dataset_key, columns):
+    """Open the labeling dataset, paging it from S3 when a Parquet or indexed JSONL copy is configured"""
+    from rich import print
+    from dataset_io import FrameDataset, JsonlS3Dataset, ParquetS3Dataset
+
+    paged_formats = {"parquet": ParquetS3Dataset, "jsonl": JsonlS3Dataset}
+    if dataset_format in paged_formats:
+        s3_key = f"{dataset_key}.{dataset_format}"
+        try:
+            dataset = paged_formats[dataset_format](s3, bucket_name, s3_key, columns)
+            print(f"✅ Opened {len(dataset)} rows from s3://{bucket_name}/{s3_key}")
+            return dataset
+        except Exception as e:
+            print(f"❌ Error opening {dataset_format} dataset from S3: {str(e)}")
+            return None
+
+    df = read_frame_from_s3(s3, bucket_name, f"{dataset_key}.json", columns)
+    return FrameDataset(df) if df is not None else None
+
+
 def upload_validated_data_to_s3(s3, df, validation_states, bucket_name, prefix, username=None) -> bool:
-    """Upload validated data back to S3 as JSON"""
+    """Stream validated data back to S3 as compressed JSON with a multipart upload"""
+    import pandas as pd
+
     try:
-        # Create a copy of the dataframe with validation column
-        df_with_validation = df.copy()
-        df_with_validation['is_validated'] = validation_states
-        
-        # Convert to JSON format similar to the original structure
-        validated_data = {
-            "data_deduplicated": df_with_validation.to_dict('records'),
-            "metadata": {
-                "total_rows": len(df),
-                "validated_rows": sum(validation_states),
-                "validation_timestamp": pd.Timestamp.now().isoformat(),
-                "validated_by": username if username else "unknown"
-            }
+        metadata = {
+            "total_rows": len(df),
+            "validated_rows": validation_states.validated_count,
+            "validation_timestamp": pd.Timestamp.now().isoformat(),
+            "validated_by": username if username else "unknown"
         }
 
         timestamp = pd.Timestamp.now().isoformat()
+        extension, content_type = COMPRESSIONS[upload_compression]
         
         # Upload to S3 with username in filename if provided
         if username:
-            s3_key = f"{prefix}validated_data_pairs_{username}_{timestamp}.json"
+            s3_key = f"{prefix}validated_data_pairs_{username}_{timestamp}{extension}"
         else:
-            s3_key = f"{prefix}validated_data_pairs_{timestamp} (anonymous).json"
+            s3_key = f"{prefix}validated_data_pairs_{timestamp} (anonymous){extension}"
 
-        json_str = json.dumps(validated_data, ensure_ascii=False, indent=2)
-
-        s3.put_object(Bucket=bucket_name, Key=s3_key, Body=json_str.encode('utf-8'))
+        # The JSON document is serialized, compressed and uploaded a block at a time
+        with tracer.span("upload", rows=len(df), compression=upload_compression) as span:
+            chunks = iter_validated_json_chunks(df, validation_states.bits, metadata)
+            span["bytes"] = upload_multipart(
+                s3, bucket_name, s3_key, compress_chunks(chunks, upload_compression),
+                part_size=upload_part_size, max_concurrency=upload_max_concurrency, ContentType=content_type,
+            )
        
         st.success(f"✅ Successfully uploaded validated data to s3://{bucket_name}/{s3_key}")
         return True
@@ -71,21 +139,534 @@ def upload_validated_data_to_s3(s3, df, validation_states, bucket_name, prefix,
         return False
 
 
-# Set page config
-st.set_page_config(
-    page_title="Data Labeling (Pairs)",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+def restore_autosaved_validations():
+    """Apply the labeler's autosaved validations from S3 to the loaded dataset"""
+    saved = st.session_state.validation_log.load()
+    ids = st.session_state.dataset.to_frame()["id"]
+    rows_by_id = dict(zip(ids, range(len(ids))))
+    for row_id, record in saved.items():
+        idx = rows_by_id.get(row_id)
+        if idx is not None:
+            st.session_state.validation_states.set(idx, record["is_validated"])
+            # Checkboxes already rendered keep their own state, so update it as well
+            if f"validate_{idx}" in st.session_state:
+                st.session_state[f"validate_{idx}"] = record["is_validated"]
+
+
+@st.fragment(run_every=AUTOSAVE_INTERVAL_SECONDS)
+def autosave_validations():
+    """Append the validation changes made since the last autosave to the S3 log"""
+    validation_log = st.session_state.validation_log
+    try:
+        validation_log.flush()
+    except Exception as e:
+        st.caption(f"❌ Autosave failed: {str(e)}")
+        return
+    if validation_log.last_saved is not None:
+        st.caption(f"💾 Last autosave: {validation_log.last_saved:%H:%M:%S}")
+
+
+def rows_per_page():
+    """Return the page size of the current view"""
+    if st.session_state.get("grid_view"):
+        return st.session_state.get("grid_rows_per_page", GRID_PAGE_SIZES[0])
+    return ROWS_PER_PAGE
+
+
+def page_prefetcher(dataset):
+    """Return this session's read-ahead cache of pages of a remote dataset"""
+    from dataset_io import PagePrefetcher
+
+    prefetcher = st.session_state.get("page_prefetcher")
+    if prefetcher is None or prefetcher.dataset is not dataset or prefetcher.rows_per_page != rows_per_page():
+        prefetcher = st.session_state.page_prefetcher = PagePrefetcher(dataset, rows_per_page())
+    return prefetcher
+
+
+def cancel_prefetch():
+    """Cancel the pending read-aheads around the page being left"""
+    if st.session_state.get("page_prefetcher") is not None:
+        st.session_state.page_prefetcher.cancel()
+
+
+def change_page_size():
+    """Keep the rows of the page shown in view when the grid view or its page size changes"""
+    old_size = st.session_state.get("current_page_size", ROWS_PER_PAGE)
+    first_row = (st.session_state.get("current_page", 1) - 1) * old_size
+    if st.session_state.get("dataset") is not None:
+        # The page shown is clamped to the last one
+        first_row = min(first_row, max(len(st.session_state.dataset) - 1, 0) // old_size * old_size)
+    # The row kept in view across size changes, until the labeler moves to another page
+    anchor = st.session_state.get("page_anchor_row")
+    if anchor is None or not first_row <= anchor < first_row + old_size:
+        anchor = st.session_state.page_anchor_row = first_row
+    st.session_state.current_page = anchor // rows_per_page() + 1
+    st.session_state.current_page_size = rows_per_page()
+    # Recreate the "Jump to page" input so it shows the new page
+    st.session_state.pop("jump_page_input", None)
+    cancel_prefetch()
+
+
+def jump_to_page():
+    """Move to the page picked in the "Jump to page" input before the table fragment reruns"""
+    st.session_state.current_page = int(st.session_state.jump_page_input)
+    cancel_prefetch()
+
+
+def group_index(dataset):
+    """Return the shared group index of the dataset, keeping this session's validated counts per group"""
+    from dataset_index import index_cache
+
+    groups = index_cache.get_groups(dataset.to_frame())
+    validation_states = st.session_state.validation_states
+    if validation_states.group_codes is not groups.codes:
+        validation_states.track_groups(groups.codes, len(groups))
+    return groups
+
+
+def move_to_group(group):
+    """Show another group in "page by group" mode"""
+    st.session_state.current_group = group
+    # Recreate the "Jump to group" input so it shows the new group
+    st.session_state.pop("jump_group_input", None)
+
+
+def jump_to_group():
+    """Move to the group picked in the "Jump to group" input before the table fragment reruns"""
+    st.session_state.current_group = int(st.session_state.jump_group_input) - 1
+
+
+def jump_to_row(idx):
+    """Move to the page (or group) holding a row picked in the search results"""
+    if st.session_state.get("page_by_group"):
+        group = group_index(st.session_state.dataset).codes[idx]
+        if group >= 0:
+            move_to_group(int(group))
+        return
+    st.session_state.current_page = idx // rows_per_page() + 1
+    st.session_state.page_anchor_row = idx
+    # Recreate the "Jump to page" input so it shows the new page
+    st.session_state.pop("jump_page_input", None)
+    cancel_prefetch()
+
+
+def render_search(dataset):
+    """Find rows by id, group or sentence words with the shared dataset index"""
+    from dataset_index import index_cache
+    from dataset_io import PAIRS_TEXT_COLUMNS
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        field = st.selectbox("Search by:", list(SEARCH_FIELDS), key="search_field")
+    with col2:
+        query = st.text_input("Search:", key="search_query", placeholder="e.g. 42, group_7 or a few words")
+    if not query.strip():
+        return
+
+    df = dataset.to_frame()
+    # Built once per dataset version and shared by every session, so this only waits on the first search
+    with st.spinner("Indexing the dataset" + (" (downloads all rows from S3)..." if dataset.is_remote else "...")):
+        index = index_cache.get(df, PAIRS_TEXT_COLUMNS)
+    with tracer.span("search", field=SEARCH_FIELDS[field], dataset_rows=len(dataset)) as span:
+        rows, total = index.search(SEARCH_FIELDS[field], query)
+        span["matches"] = total
+    if total == 0:
+        st.info("No matching rows")
+        return
+
+    st.caption(f"{total} matching rows" + (f", showing the first {len(rows)}" if total > len(rows) else ""))
+    st.dataframe(df.iloc[rows].assign(row=rows + 1).set_index("row"))
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        idx = st.selectbox(
+            "Go to row:",
+            rows.tolist(),
+            format_func=lambda idx: f"Row {idx + 1} (id {df['id'].iat[idx]})",
+            key="search_row",
+        )
+    with col2:
+        st.button("➡️ Go", on_click=jump_to_row, args=(idx,))
+
+
+def style_grid(table):
+    """Color the sentence and label cells of a grid page by label, computed for the whole page at once"""
+    import numpy as np
+    import pandas as pd
+
+    positive = table["label"].astype(str).isin(["1", "True"]).to_numpy()
+    # Green for label 1, red for label 0, as in the row view
+    colors = np.where(positive, "color: #155724", "color: #721c24")
+    styles = pd.DataFrame("", index=table.index, columns=table.columns)
+    for column in ["sentence1", "sentence2", "label"]:
+        styles[column] = colors
+    return table.style.apply(lambda _: styles, axis=None)
+
+
+def apply_grid_edits(grid_key, page_rows, ids):
+    """Apply the boxes toggled in the grid to the validation states, recording them for the next autosave"""
+    validation_states = st.session_state.validation_states
+    validation_log = st.session_state.get("validation_log")
+    # Edits accumulate while the grid is shown, so earlier ones are applied again as no-ops
+    for position, change in st.session_state[grid_key]["edited_rows"].items():
+        if "is_validated" in change:
+            idx = int(page_rows[int(position)])
+            if validation_states.set(idx, change["is_validated"]) and validation_log:
+                validation_log.record(ids[int(position)], change["is_validated"])
+
+
+def render_grid(page_df, page_rows):
+    """Render a page as one editable grid with a validation column, instead of widgets per row"""
+    import numpy as np
+
+    validation_states = st.session_state.validation_states
+    page_rows = np.asarray(page_rows)
+    validated = np.fromiter((validation_states[int(idx)] for idx in page_rows), dtype=bool, count=len(page_rows))
+
+    # The grid keeps its edits in session state; drop those of the page shown before
+    grid_key = f"validation_grid_{page_rows[0] if len(page_rows) else 0}_{len(page_rows)}"
+    previous_key = st.session_state.get("validation_grid_key")
+    if previous_key is not None and previous_key != grid_key:
+        st.session_state.pop(previous_key, None)
+    st.session_state.validation_grid_key = grid_key
+
+    # The grid is given the table built when the page was entered, on every rerun, so it is
+    # not recreated (losing its scroll position and focus) each time a box is toggled; it
+    # shows its own edits on top of that table
+    snapshot = st.session_state.get("validation_grid_table")
+    if snapshot is not None and snapshot[0] == grid_key:
+        table, styled = snapshot[1], snapshot[2]
+        shown = table["is_validated"].to_numpy().copy()
+        for position, change in st.session_state.get(grid_key, {}).get("edited_rows", {}).items():
+            if "is_validated" in change:
+                shown[int(position)] = change["is_validated"]
+        same_rows = np.array_equal(table["id"].to_numpy(), page_df["id"].to_numpy())
+        if not same_rows or not np.array_equal(shown, validated):
+            # The validations changed outside the grid (such as a restore from the autosave),
+            # or another dataset was loaded; start over
+            st.session_state.pop(grid_key, None)
+            snapshot = None
+    if snapshot is None or snapshot[0] != grid_key:
+        table = page_df.reset_index(drop=True).assign(is_validated=validated)
+        table.index = page_rows + 1
+        styled = style_grid(table)
+        st.session_state.validation_grid_table = (grid_key, table, styled)
+
+    st.data_editor(
+        styled,
+        column_config={
+            "_index": st.column_config.NumberColumn("Row"),
+            "is_validated": st.column_config.CheckboxColumn("✓ Valid"),
+        },
+        disabled=list(page_df.columns),
+        width="stretch",
+        height=min(35 * (len(table) + 1) + 3, 600),
+        key=grid_key,
+        on_change=apply_grid_edits,
+        args=(grid_key, page_rows, table["id"].tolist()),
+    )
+
+
+def render_rows(page_df, page_rows):
+    """Render a page one row at a time, with a checkbox per row"""
+    # Edits kept by the grid view would be stale once rows are changed here
+    grid_key = st.session_state.pop("validation_grid_key", None)
+    if grid_key is not None:
+        st.session_state.pop(grid_key, None)
+    st.session_state.pop("validation_grid_table", None)
+
+    # Create table header
+    header_col1, header_col2, header_col3, header_col4, header_col5, header_col6 = st.columns([2, 2, 2, 2, 2, 1])
+    
+    with header_col1:
+
+        st.markdown("**🔄 ID**")
+    with header_col2:
+        st.markdown("**🔄 Group ID**")
+    with header_col3:
+        st.markdown("**🔗 Sentence 1**")
+    with header_col4:
+        st.markdown("**🔄 Sentence 2**")
+    
+    with header_col5:
+        st.markdown("**✅ Label**")
+    
+    with header_col6:
+        st.markdown("**✓ Validation**")
+    
+    # Add a separator line
+    st.markdown("---")
+
+    for i, idx in enumerate(page_rows):
+        idx = int(idx)
+        row = page_df.iloc[i]
+        col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 2, 2, 2, 1])
+
+        label_val = row["label"]
+        # Set color: green for label==1, red for label==0
+        if label_val == 1 or label_val == "1" or label_val == True:
+            bg_color = "#d4edda"  # green
+            font_color = "#155724"
+        else:
+            bg_color = "#f8d7da"  # red
+            font_color = "#721c24"
+
+        with col1:
+            st.write(f"{row['id']}")
+        with col2:
+            st.write(f"{row['group_id']}")
+        with col3:
+            st.markdown(
+                f"<div style='color: {font_color}; padding: 8px; border-radius: 5px'>{html.escape(str(row['sentence1']))}</div>",
+                unsafe_allow_html=True,
+            )
+        with col4:
+            st.markdown(
+                f"<div style='color: {font_color}; padding: 8px; border-radius: 5px'>{html.escape(str(row['sentence2']))}</div>",
+                unsafe_allow_html=True,
+            )
+        with col5:
+            st.markdown(
+                f"<div style='color: {font_color}; padding: 8px; border-radius: 5px'>{html.escape(str(row['label']))}</div>",
+                unsafe_allow_html=True,
+            )
+        
+    
+        with col6:
+            # Create unique key for each checkbox
+            checkbox_key = f"validate_{idx}"
+            is_valid = st.checkbox(
+                "✓ Valid", 
+                value=st.session_state.validation_states[idx],
+                key=checkbox_key
+            )
+            # Update session state, recording the change for the next autosave
+            if st.session_state.validation_states.set(idx, is_valid) and st.session_state.get("validation_log"):
+                st.session_state.validation_log.record(row['id'], is_valid)
+    
+        st.divider()
+
+
+@st.fragment
+def render_validation_table(dataset):
+    """Render the current page with its checkboxes; toggling one reruns only this fragment"""
+    grid = st.session_state.get("grid_view", False)
+
+    # Page through whole groups, or through fixed-size pages of rows
+    groups = group_index(dataset) if st.session_state.get("page_by_group") else None
+    if groups is not None and len(groups) == 0:
+        groups = None
+
+    if groups is not None:
+        if 'current_group' not in st.session_state:
+            st.session_state.current_group = 0
+        group = min(st.session_state.current_group, len(groups) - 1)
+        page_rows = groups.rows_of(group)
+        st.info(f"Showing group {groups.groups[group]}: {len(page_rows)} rows (Group {group + 1} of {len(groups)})")
+
+        with tracer.span("page_read", rows=len(page_rows), dataset_rows=len(dataset), remote=dataset.is_remote):
+            page_df = dataset.to_frame().iloc[page_rows]
+    else:
+        group = None
+        # Pagination setup
+        page_size = rows_per_page()
+        total_pages = max((len(dataset) + page_size - 1) // page_size, 1)
+    
+        # Initialize page in session state
+        if 'current_page' not in st.session_state:
+            st.session_state.current_page = 1
+    
+        # Always use session state for the current page (the page size may have grown since)
+        page = min(st.session_state.current_page, total_pages)
+    
+        # Page navigation - just show current page info
+        if total_pages > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                st.write(f"**Current Page: {page} of {total_pages}**")
+    
+        # Calculate start and end indices for current page
+        start_idx = (page - 1) * page_size
+        end_idx = min(start_idx + page_size, len(dataset))
+    
+        # Display pagination info
+        st.info(f"Showing rows {start_idx + 1}-{end_idx} of {len(dataset)} total rows (Page {page} of {total_pages})")
+    
+        page_rows = range(start_idx, end_idx)
+        with tracer.span("page_read", rows=end_idx - start_idx, dataset_rows=len(dataset), remote=dataset.is_remote) as span:
+            if dataset.is_remote:
+                # Usually read ahead while the previous page was shown
+                span["prefetched"] = page in page_prefetcher(dataset)
+                page_df = page_prefetcher(dataset).get(page)
+            else:
+                page_df = dataset.read_rows(start_idx, end_idx)
+
+    # Display each row with validation checkbox for the current page
+    with tracer.span("page_render", rows=len(page_rows), dataset_rows=len(dataset), grid=grid):
+        if grid:
+            render_grid(page_df, page_rows)
+        else:
+            render_rows(page_df, page_rows)
+
+    # Show validation summary
+    render_validation_summary(len(dataset), page_rows, group)
+
+    # Page navigation
+    if groups is not None and len(groups) > 1:
+        st.markdown("---")
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            st.button("⬅️ Previous group", on_click=move_to_group, args=(group - 1,), disabled=group == 0)
+        with col2:
+            st.number_input(
+                "Jump to group:",
+                min_value=1,
+                max_value=len(groups),
+                value=group + 1,
+                step=1,
+                key="jump_group_input",
+                on_change=jump_to_group,
+            )
+        with col3:
+            st.button("Next group ➡️", on_click=move_to_group, args=(group + 1,), disabled=group == len(groups) - 1)
+    elif groups is None and total_pages > 1:
+        st.markdown("---")
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col2:
+            st.number_input(
+                "Jump to page:",
+                min_value=1,
+                max_value=total_pages,
+                value=page,
+                step=1,
+                key="jump_page_input",
+                on_change=jump_to_page,
+            )
+
+    # Read the neighbouring pages in the background while this one is reviewed
+    if groups is None and dataset.is_remote:
+        page_prefetcher(dataset).prefetch([page + 1, page - 1])
+
+
+@st.fragment
+def render_validation_summary(total_count, page_rows, group=None):
+    """Render the validation counters and progress bar from the running totals"""
+    with tracer.span("metrics", rows=len(page_rows), dataset_rows=total_count):
+        validated_count = st.session_state.validation_states.validated_count
+        remaining_count = st.session_state.validation_states.remaining_count
+
+        # Current page (or group) validation stats
+        if group is not None:
+            current_page_validated = int(st.session_state.validation_states.group_counts[group])
+        else:
+            current_page_validated = st.session_state.validation_states.count(page_rows.start, page_rows.stop)
+        current_page_total = len(page_rows)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Rows", total_count)
+    with col2:
+        st.metric("Validated", validated_count)
+    with col3:
+        st.metric("Remaining", remaining_count)
+    with col4:
+        st.metric("Group Validated" if group is not None else "Page Validated", f"{current_page_validated}/{current_page_total}")
+    
+    # Progress bar
+    progress = validated_count / total_count if total_count > 0 else 0
+    st.progress(progress, text=f"Overall Progress: {validated_count}/{total_count} ({progress:.1%})")
+
+
+@st.fragment
+def render_results(dataset):
+    """Render the download and upload area; exports are only built when a labeler asks for them"""
+    # Checkbox edits only rerun the validation table, not this section
+    st.caption("Downloads reflect the validations at the time this section was last refreshed.")
+    st.button("🔄 Refresh downloads", key="refresh_results")
+
+    validation_states = st.session_state.validation_states
+    if 'export_cache' not in st.session_state:
+        st.session_state.export_cache = ExportCache()
+    export_cache = st.session_state.export_cache
+    
+    # Exports are built for the validations at the time of the request and reused until they change
+    exports_ready = export_cache.is_current(validation_states.version)
+    if not exports_ready:
+        st.button(
+            "📦 Prepare downloads",
+            help="Build the CSV exports from the current validations"
+            + (" (downloads all rows from S3)" if dataset.is_remote else ""),
+            on_click=lambda: export_cache.request(st.session_state.validation_states.version),
+        )
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if exports_ready:
+            st.download_button(
+                label="📄 Download CSV with Validation",
+                data=export_cache.get("all", lambda: iter_csv_chunks(dataset.to_frame(), validation_states.bits)),
+                file_name="validated_data_pairs.csv",
+                mime="text/csv",
+                help="Download the data with validation results as a CSV file"
+            )
+        else:
+            st.info("Prepare the downloads to export the current validations")
+    
+    with col2:
+        # Download only validated rows
+        if validation_states.validated_count == 0:
+            st.info("No validated rows to download yet")
+        elif exports_ready:
+            st.download_button(
+                label="✅ Download Only Validated Rows",
+                data=export_cache.get(
+                    "validated",
+                    lambda: iter_csv_chunks(dataset.to_frame(), validation_states.bits, only_validated=True),
+                ),
+                file_name="validated_only_data_pairs.csv",
+                mime="text/csv",
+                help="Download only the rows that have been validated"
+            )
+    
+    with col3:
+        # Upload to S3 button; the validated rows are counted when it is clicked, since
+        # this section is not rerun by checkbox edits
+        # Request username to append to S3 filename
+        username = st.text_input(
+            "Enter your username (to be appended to the S3 filename):",
+            value="",
+            max_chars=32,
+            placeholder="e.g. alice"
+        )
+        if not username:
+            st.info("Please enter a username before uploading.")
+        else:
+            if st.button(
+                "☁️ Push to S3",
+                help="Upload validated data back to S3 as JSON",
+                type="primary"
+            ):
+                if st.session_state.validation_states.validated_count == 0:
+                    st.info("No validated rows to upload yet")
+                else:
+                    with st.spinner("Uploading validated data to S3..."):
+                        # Pass username to upload function, or modify S3 key/filename
+                        success = upload_validated_data_to_s3(
+                            s3,
+                            dataset.to_frame(),
+                            st.session_state.validation_states,
+                            bucket_name, 
+                            prefix,
+                            username=username
+                        )
+
+
 
-# Main content
-st.title("Data Labeling (Pairs)")
 #st.write("Upload a JSON file to display its contents in a table.")
 
-# Initialize session state for S3 data
-if 's3_data' not in st.session_state:
-    st.session_state.s3_data = None
+# Initialize session state for the dataset
+if 'dataset' not in st.session_state:
+    st.session_state.dataset = None
 
 # File uploader section
 col1, col2 = st.columns([1, 1])
@@ -93,9 +674,12 @@ col1, col2 = st.columns([1, 1])
 with col1:
     if st.button("⬇️ Download data"):
         try:
-            json_obj = read_json_from_s3(s3, bucket_name, f"{prefix}assembled_data_pairs.json")
-            if json_obj is not None:
-                st.session_state.s3_data = json_obj
+            from dataset_io import PAIRS_COLUMNS
+
+            dataset = load_dataset(s3, bucket_name, f"{prefix}{dataset_name}", PAIRS_COLUMNS)
+            if dataset is not None:
+                st.session_state.dataset = dataset
+                st.session_state.export_cache = ExportCache()
                 st.info(f"✅ Successfully downloaded data")
             else:
                 st.error("Failed to download data from S3")
@@ -104,38 +688,108 @@ with col1:
 
 with col2:
     if st.button("🗑️ Clear Data"):
-        st.session_state.s3_data = None
-        st.session_state.validation_states = []
+        from validation_state import ValidationState
+
+        # Save the pending changes before their validation states are dropped
+        if st.session_state.get("validation_log") is not None:
+            try:
+                st.session_state.validation_log.flush()
+            except Exception as e:
+                st.warning(f"❌ Could not save the last changes: {str(e)}")
+        st.session_state.dataset = None
+        st.session_state.validation_states = ValidationState(0)
+        st.session_state.export_cache = ExportCache()
+        st.session_state.page_prefetcher = None
         st.success("Data cleared!")
 
+# Dataset cache counters (shared by every session on this server)
+with st.sidebar:
+    cache_stats = dataset_cache.stats()
+    st.caption(
+        f"🗄️ Dataset cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['coalesced']} coalesced, {cache_stats['entries']} entries "
+        f"({cache_stats['bytes'] / 1024 ** 2:.1f} MB)"
+    )
+    if dataset_cache.disk_cache is not None:
+        st.caption(f"💽 Disk cache: {cache_stats['disk_hits']} hits, {dataset_cache.disk_cache.nbytes() / 1024 ** 2:.1f} MB")
+    if st.session_state.get("page_prefetcher") is not None:
+        prefetch_stats = st.session_state.page_prefetcher.stats()
+        st.caption(
+            f"📖 Read-ahead: {prefetch_stats['hits']} hits, {prefetch_stats['misses']} misses, "
+            f"{prefetch_stats['pages']} pages cached"
+        )
+    if show_sessions:
+        with st.expander("🛠️ Session overlays"):
+            import pandas as pd
+            from validation_state import overlay_report
+
+            overlays = overlay_report()
+            if overlays:
+                st.dataframe(pd.DataFrame(overlays), hide_index=True)
+            else:
+                st.caption("No active labeling sessions")
+    if show_timings:
+        with st.expander("⏱️ Timings"):
+            import pandas as pd
+
+            timings = tracer.percentiles()
+            if timings:
+                st.dataframe(pd.DataFrame(timings), hide_index=True)
+            else:
+                st.caption("No timings recorded yet")
+
+# Autosave validation changes to an append-only log on S3
+with st.sidebar:
+    st.subheader("💾 Autosave")
+    autosave_user = st.text_input(
+        "Autosave as:",
+        value="",
+        max_chars=32,
+        placeholder="e.g. alice",
+        key="autosave_user"
+    )
+    if st.toggle("Save changes to S3 every few seconds", key="autosave_enabled", disabled=not autosave_user):
+        validation_log = st.session_state.get("validation_log")
+        if validation_log is None or validation_log.username != autosave_user:
+            from validation_log import ValidationLog, log_prefix
+
+            st.session_state.validation_log = ValidationLog(
+                s3, bucket_name, log_prefix(prefix, dataset_name, autosave_user), autosave_user
+            )
+        autosave_validations()
+        st.button(
+            "↩️ Restore autosaved validations",
+            on_click=restore_autosaved_validations,
+            disabled=st.session_state.dataset is None or 'validation_states' not in st.session_state,
+        )
+    elif st.session_state.get("validation_log") is not None:
+        # Save what is left before turning autosave off
+        try:
+            st.session_state.validation_log.flush()
+        except Exception as e:
+            st.warning(f"❌ Could not save the last changes: {str(e)}")
+        st.session_state.validation_log = None
+
 # Show data status
-if st.session_state.s3_data is not None:
+if st.session_state.dataset is not None:
     st.info(f"📊 Data loaded, ready for validation")
 
 # Use session state data
-json_obj = st.session_state.s3_data
+dataset = st.session_state.dataset
 
-if json_obj is not None:
+if dataset is not None:
+    from validation_state import ValidationState, session_states
 
     try:
-        # Read and parse JSON
-        #json_data = json.load(uploaded_file)
-        json_data = json_obj
-        
-        try:
-            df = pd.DataFrame(json_data["data_deduplicated"])
-            df = df[["id", "group_id", "sentence1", "sentence2", "label"]]
-        except Exception as e:
-            st.error("Unsupported JSON format. Please upload a JSON file with an array of objects or a single object.")
-            st.stop()
-
-        # Initialize session state for validation checkboxes if not exists
-        if 'validation_states' not in st.session_state:
-            st.session_state.validation_states = [False] * len(df)
-        
-        # Ensure validation states match current dataframe length
-        if len(st.session_state.validation_states) != len(df):
-            st.session_state.validation_states = [False] * len(df)
+        # Initialize session state for validation checkboxes if not exists, or if it
+        # does not match the current dataset length. The dataset itself is shared by every
+        # session; each session only holds its overlay of validation flags.
+        if (
+            'validation_states' not in st.session_state
+            or len(st.session_state.validation_states) != len(dataset)
+        ):
+            st.session_state.validation_states = ValidationState(len(dataset))
+            session_states[get_script_run_ctx().session_id] = st.session_state.validation_states
 
         # Display validation interface
         st.subheader("📊 Data Validation Table")
@@ -143,209 +797,35 @@ if json_obj is not None:
             Review the sentences and check the box if they are correctly labeled, leave it unchecked if you are not sure. Once you are done, click the 'Download & Upload Results' button to download the validated data or upload it back to S3 by entering your first name in the text box.
         """, icon="💡")
         
-        # Create table header
-        header_col1, header_col2, header_col3, header_col4, header_col5, header_col6 = st.columns([2, 2, 2, 2, 2, 1])
-        
-        with header_col1:
-
-            st.markdown("**🔄 ID**")
-        with header_col2:
-            st.markdown("**🔄 Group ID**")
-        with header_col3:
-            st.markdown("**🔗 Sentence 1**")
-        with header_col4:
-            st.markdown("**🔄 Sentence 2**")
-        
-        with header_col5:
-            st.markdown("**✅ Label**")
-        
-        with header_col6:
-            st.markdown("**✓ Validation**")
-        
-        # Add a separator line
-        st.markdown("---")
-        
-        # Pagination setup
-        rows_per_page = 5
-        total_pages = (len(df) + rows_per_page - 1) // rows_per_page
-        
-        # Initialize page in session state
-        if 'current_page' not in st.session_state:
-            st.session_state.current_page = 1
-        
-        # Always use session state for the current page
-        page = st.session_state.current_page
-        
-        # Page navigation - just show current page info
-        if total_pages > 1:
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                st.write(f"**Current Page: {page} of {total_pages}**")
-        
-        # Calculate start and end indices for current page
-        start_idx = (page - 1) * rows_per_page
-        end_idx = min(start_idx + rows_per_page, len(df))
-        
-        # Display pagination info
-        st.info(f"Showing rows {start_idx + 1}-{end_idx} of {len(df)} total rows (Page {page} of {total_pages})")
-        
-        # Display each row with validation checkbox for current page
-        for idx in range(start_idx, end_idx):
-            row = df.iloc[idx]
-            col1, col2, col3, col4, col5, col6 = st.columns([2, 2, 2, 2, 2, 1])
-
-            label_val = row["label"]
-            # Set color: green for label==1, red for label==0
-            if label_val == 1 or label_val == "1" or label_val == True:
-                bg_color = "#d4edda"  # green
-                font_color = "#155724"
-            else:
-                bg_color = "#f8d7da"  # red
-                font_color = "#721c24"
+        with st.expander("🔎 Search", expanded=bool(st.session_state.get("search_query"))):
+            render_search(dataset)
 
-            with col1:
-                st.write(f"{row['id']}")
-            with col2:
-                st.write(f"{row['group_id']}")
-            with col3:
-                st.markdown(
-                    f"<div style='color: {font_color}; padding: 8px; border-radius: 5px'>{row['sentence1']}</div>",
-                    unsafe_allow_html=True,
-                )
-            with col4:
-                st.markdown(
-                    f"<div style='color: {font_color}; padding: 8px; border-radius: 5px'>{row['sentence2']}</div>",
-                    unsafe_allow_html=True,
-                )
-            with col5:
-                st.markdown(
-                    f"<div style='color: {font_color}; padding: 8px; border-radius: 5px'>{row['label']}</div>",
-                    unsafe_allow_html=True,
-                )
-                
-            
-            with col6:
-                # Create unique key for each checkbox
-                checkbox_key = f"validate_{idx}"
-                is_valid = st.checkbox(
-                    "✓ Valid", 
-                    value=st.session_state.validation_states[idx],
-                    key=checkbox_key
-                )
-                # Update session state
-                st.session_state.validation_states[idx] = is_valid
-            
-            st.divider()
-        
-        # Show validation summary
-        validated_count = sum(st.session_state.validation_states)
-        total_count = len(df)
-        
-        # Current page validation stats
-        current_page_validated = sum(st.session_state.validation_states[start_idx:end_idx])
-        current_page_total = end_idx - start_idx
-        
-        col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3 = st.columns([1, 1, 2])
         with col1:
-            st.metric("Total Rows", total_count)
+            st.toggle(
+                "📚 Page by group",
+                key="page_by_group",
+                help="Show one whole group_id per page" + (" (downloads all rows from S3)" if dataset.is_remote else ""),
+            )
         with col2:
-            st.metric("Validated", validated_count)
+            st.toggle(
+                "🧮 Grid view",
+                key="grid_view",
+                help="Show a whole page of rows as one editable table",
+                on_change=change_page_size,
+            )
         with col3:
-            st.metric("Remaining", total_count - validated_count)
-        with col4:
-            st.metric("Page Validated", f"{current_page_validated}/{current_page_total}")
-        
-        # Progress bar
-        progress = validated_count / total_count if total_count > 0 else 0
-        st.progress(progress, text=f"Overall Progress: {validated_count}/{total_count} ({progress:.1%})")
-        
-        # Page navigation
-        if total_pages > 1:
-            st.markdown("---")
-            col1, col2, col3 = st.columns([1, 1, 1])
-            with col2:
-                jump_page = st.number_input(
-                    "Jump to page:",
-                    min_value=1,
-                    max_value=total_pages,
-                    value=page,
-                    step=1,
-                    key="jump_page_input"
-                )
-                if jump_page != page:
-                    st.session_state.current_page = int(jump_page)
-                    st.rerun()
+            if st.session_state.get("grid_view"):
+                st.selectbox("Rows per page:", GRID_PAGE_SIZES, key="grid_rows_per_page", on_change=change_page_size)
+        render_validation_table(dataset)
         
         # Download and Upload section
         st.subheader("📥 Download & Upload Results")
         
-        # Create a copy of the dataframe with validation column
-        df_with_validation = df.copy()
-        df_with_validation['is_validated'] = st.session_state.validation_states
-        
-        # Convert to CSV for download
-        csv_data = df_with_validation.to_csv(index=False)
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.download_button(
-                label="📄 Download CSV with Validation",
-                data=csv_data,
-                file_name="validated_data_pairs.csv",
-                mime="text/csv",
-                help="Download the data with validation results as a CSV file"
-            )
-        
-        with col2:
-            # Download only validated rows
-            validated_df = df_with_validation[df_with_validation['is_validated'] == True]
-            if len(validated_df) > 0:
-                validated_csv = validated_df.to_csv(index=False)
-                st.download_button(
-                    label="✅ Download Only Validated Rows",
-                    data=validated_csv,
-                    file_name="validated_only_data_pairs.csv",
-                    mime="text/csv",
-                    help="Download only the rows that have been validated"
-                )
-            else:
-                st.info("No validated rows to download yet")
-        
-        with col3:
-            # Upload to S3 button
-            validated_count = sum(st.session_state.validation_states)
-            # Request username to append to S3 filename
-            if validated_count > 0:
-                username = st.text_input(
-                    "Enter your username (to be appended to the S3 filename):",
-                    value="",
-                    max_chars=32,
-                    placeholder="e.g. alice"
-                )
-                if not username:
-                    st.info("Please enter a username before uploading.")
-                else:
-                    if st.button(
-                        "☁️ Push to S3",
-                        help="Upload validated data back to S3 as JSON",
-                        type="primary"
-                    ):
-                        with st.spinner("Uploading validated data to S3..."):
-                            # Pass username to upload function, or modify S3 key/filename
-                            success = upload_validated_data_to_s3(
-                                s3,
-                                df_with_validation, 
-                                st.session_state.validation_states, 
-                                bucket_name, 
-                                prefix,
-                                username=username
-                            )
-            else:
-                st.info("No validated rows to upload yet")
+        render_results(dataset)
         
         # Show summary info
-        st.info(f"✅ Successfully loaded {len(df)} rows and {len(df.columns)} columns")
+        st.info(f"✅ Successfully loaded {len(dataset)} rows and {len(dataset.columns)} columns")
         
             
     except json.JSONDecodeError:
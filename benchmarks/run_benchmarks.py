@@ -0,0 +1,243 @@
+"""
+Benchmark the dataset, export, upload and page-render paths against an in-process S3 stand-in.
+
+Synthetic pairs and triplets datasets are uploaded to a moto S3 mock and every stage is
+timed through the code the apps and the CLI use. Results are written as JSON, and can be
+compared with a previous run to catch regressions:
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --threshold 1.25
+
+Requires the bench dependency group (moto).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+from moto import mock_aws
+from rich import print
+from streamlit.testing.v1 import AppTest
+
+from data_s3_manager import S3Manager
+from dataset_cache import dataset_cache
+from dataset_io import PAIRS_COLUMNS, TRIPLETS_COLUMNS, load_frame
+from results_export import COMPRESSIONS, compress_chunks, iter_csv_chunks, iter_validated_json_chunks, upload_multipart
+from s3_client import get_s3_client
+
+
+BUCKET_NAME = "benchmark-bucket"
+PREFIX = "benchmarks/"
+REGION = "us-east-1"
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+ROWS_PER_PAGE = 5
+
+# App script, dataset name and columns of each kind of dataset
+KINDS = {
+    "pairs": ("app_pairs.py", "assembled_data_pairs", PAIRS_COLUMNS),
+    "triplets": ("app_triplets.py", "assembled_data", TRIPLETS_COLUMNS),
+}
+
+_WORDS = (
+    "the a model label sentence data pair meaning same opposite quick brown fox jumps over lazy dog "
+    "review check valid group anchor text token query answer result river bank money stream"
+).split()
+
+
+def make_records(kind, rows, seed=0):
+    """Generate a synthetic dataset of the given kind with a fixed seed."""
+    rng = random.Random(seed)
+
+    def sentence():
+        return " ".join(rng.choices(_WORDS, k=rng.randint(6, 18)))
+
+    if kind == "pairs":
+        return [
+            {"id": i, "group_id": f"group_{i // 4}", "sentence1": sentence(), "sentence2": sentence(), "label": rng.randint(0, 1)}
+            for i in range(rows)
+        ]
+    return [
+        {
+            "id": i,
+            "group_id": f"group_{i // 4}",
+            "anchor_sentence": sentence(),
+            "opposite_sentence": sentence(),
+            "same_meaning_sentence": sentence(),
+        }
+        for i in range(rows)
+    ]
+
+
+def timed(function, repeat):
+    """Call function repeat times and return the durations in seconds and its last result."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return durations, result
+
+
+def run_app_stages(kind, rows, repeat):
+    """Time the app through Streamlit's AppTest harness: download, page change, exports and push."""
+    app_file, _, _ = KINDS[kind]
+    timings = {}
+    for _ in range(repeat):
+        at = AppTest.from_file(os.path.join(REPO_ROOT, app_file), default_timeout=600)
+        at.secrets["aws"] = {
+            "AWS_ACCESS_KEY_ID": "benchmark",
+            "AWS_SECRET_ACCESS_KEY": "benchmark",
+            "AWS_REGION": REGION,
+            "bucket_name": BUCKET_NAME,
+            "prefix": PREFIX,
+        }
+        at.run()
+        dataset_cache.clear()
+
+        def step(stage, action):
+            start = time.perf_counter()
+            action()
+            timings.setdefault(stage, []).append(time.perf_counter() - start)
+            if at.exception:
+                raise RuntimeError(f"{app_file} raised during {stage}: {at.exception[0].message}")
+
+        step("app_download", lambda: next(b for b in at.button if "Download data" in b.label).click().run())
+        if rows > ROWS_PER_PAGE:
+            step("app_page_render", lambda: at.number_input(key="jump_page_input").set_value(2).run())
+        step("app_prepare_exports", lambda: next(b for b in at.button if "Prepare downloads" in b.label).click().run())
+        if kind == "pairs":
+            at.checkbox[0].check().run()
+            username = next(t for t in at.text_input if "S3 filename" in t.label)
+            username.input("benchmark").run()
+            step("app_push_to_s3", lambda: next(b for b in at.button if "Push to S3" in b.label).click().run())
+    return timings
+
+
+def run_benchmarks(sizes, kinds, repeat, app=True):
+    """Run every stage for every kind and size, returning one result dict per stage."""
+    results = []
+    with mock_aws():
+        s3 = get_s3_client(region_name=REGION)
+        s3.create_bucket(Bucket=BUCKET_NAME)
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = S3Manager(bucket_name=BUCKET_NAME, prefix=PREFIX)
+
+        for kind in kinds:
+            _, dataset_name, columns = KINDS[kind]
+            for rows in sizes:
+                s3_key = f"{PREFIX}{dataset_name}.json"
+                body = json.dumps({"data_deduplicated": make_records(kind, rows)}, ensure_ascii=False).encode('utf-8')
+                s3.put_object(Bucket=BUCKET_NAME, Key=s3_key, Body=body)
+                print(f"[bold]{kind}[/bold], {rows} rows ({len(body) / 1024 ** 2:.1f} MB)")
+
+                stages = {}
+                stages["s3_get_object"], _ = timed(
+                    lambda: s3.get_object(Bucket=BUCKET_NAME, Key=s3_key)["Body"].read(), repeat
+                )
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stages["read_json_from_s3"], _ = timed(
+                        lambda: manager.read_json_from_s3(s3_key, use_cache=False), repeat
+                    )
+                stages["load_frame"], df = timed(
+                    lambda: load_frame(s3.get_object(Bucket=BUCKET_NAME, Key=s3_key)["Body"], columns), repeat
+                )
+
+                bits = np.zeros(len(df), dtype=bool)
+                bits[::3] = True
+                stages["csv_export"], _ = timed(lambda: b"".join(iter_csv_chunks(df, bits)), repeat)
+                stages["csv_export_validated"], _ = timed(
+                    lambda: b"".join(iter_csv_chunks(df, bits, only_validated=True)), repeat
+                )
+                extension, content_type = COMPRESSIONS["gzip"]
+                stages["validated_upload"], _ = timed(
+                    lambda: upload_multipart(
+                        s3, BUCKET_NAME, f"{PREFIX}benchmark_upload{extension}",
+                        compress_chunks(iter_validated_json_chunks(df, bits, {"benchmark": True}), "gzip"),
+                        ContentType=content_type,
+                    ),
+                    repeat,
+                )
+                if app:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        stages.update(run_app_stages(kind, rows, repeat))
+
+                for stage, durations in stages.items():
+                    results.append({
+                        "kind": kind,
+                        "rows": rows,
+                        "stage": stage,
+                        "seconds": durations,
+                        "median": statistics.median(durations),
+                        "min": min(durations),
+                    })
+                    print(f"  {stage:<22} {statistics.median(durations) * 1000:10.1f} ms")
+                s3.delete_object(Bucket=BUCKET_NAME, Key=s3_key)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the stages whose median time grew by more than threshold times the baseline."""
+    previous = {(r["kind"], r["rows"], r["stage"]): r["median"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["kind"], result["rows"], result["stage"]))
+        if before and result["median"] > before * threshold:
+            regressions.append({**result, "baseline_median": before, "ratio": result["median"] / before})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the labeling apps against an in-process S3 stand-in.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f'Dataset sizes in rows (default: {DEFAULT_SIZES})')
+    parser.add_argument('--kinds', choices=list(KINDS), nargs='+', default=list(KINDS),
+                        help='Datasets to benchmark (default: pairs triplets)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each stage (default: 3)')
+    parser.add_argument('--no-app', action='store_true', help='Skip the AppTest page render stages')
+    parser.add_argument('--output', type=str, default='benchmark_results.json',
+                        help='JSON file to write the results to (default: benchmark_results.json)')
+    parser.add_argument('--baseline', type=str, help='Previous results to compare with', required=False)
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression (default: 1.25)')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.kinds, args.repeat, app=not args.no_app)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(
+                f"❌ {regression['kind']} {regression['rows']} rows {regression['stage']}: "
+                f"{regression['baseline_median'] * 1000:.1f} ms → {regression['median'] * 1000:.1f} ms "
+                f"({regression['ratio']:.2f}x)"
+            )
+        exit_code = 1 if regressions else 0
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Wrote {len(results)} results to {args.output}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
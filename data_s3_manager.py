@@ -1,7 +1,25 @@
-import boto3
 import os
 import json
+import tempfile
+import pandas as pd
 from rich import print
+from dataset_cache import dataset_cache
+from s3_client import get_s3_client
+from disk_cache import DiskCache
+from validation_log import DELTAS_DIR, compact_log
+from s3_listing import iter_objects, list_keys, listing_cache
+from s3_sync import DEFAULT_MAX_WORKERS as DEFAULT_SYNC_WORKERS, sync_down, sync_up
+from validated_results import CONFLICT_POLICIES, DEFAULT_MAX_WORKERS, load_results, merge_results
+from agreement import agreement_report
+from results_export import COMPRESSIONS, compress_chunks, iter_validated_json_chunks, upload_multipart
+from dataset_io import (
+    DEFAULT_ROW_GROUP_SIZE,
+    JSONL_INDEX_SUFFIX,
+    build_jsonl_index,
+    convert_json_to_jsonl,
+    convert_json_to_parquet,
+    iter_json_records,
+)
 
 
 class S3Manager:
@@ -27,32 +45,36 @@ class S3Manager:
         
         print(f"AWS Config: {self.aws_config}")
         
-        # Create boto3 session and S3 client
-        self.session = boto3.Session(
+        # Shared, pooled S3 client (see s3_client.py)
+        self.s3 = get_s3_client(
             aws_access_key_id=self.aws_config["access_key_id"],
             aws_secret_access_key=self.aws_config["secret_access_key"],
             region_name=self.aws_config["region"],
         )
-        self.s3 = self.session.client("s3")
     
-    def list_objects_in_folder(self, prefix=None):
+    def list_objects_in_folder(self, prefix=None, parallel=False, use_cache=False, bucket_name=None):
         """
-        List all objects in a specific S3 folder.
+        List all objects in a specific S3 folder, following continuation tokens.
         
         Args:
             prefix (str, optional): The prefix to list. If None, uses the instance prefix.
+            parallel (bool): List the sub-folders of the prefix concurrently
+            use_cache (bool): Reuse a listing of the same prefix made in the last few
+                seconds (S3_LISTING_CACHE_TTL)
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Yields:
+            dict: key, size, etag and last_modified of each object
         """
         if prefix is None:
             prefix = self.prefix
-            
-        response = self.s3.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
+        if bucket_name is None:
+            bucket_name = self.bucket_name
 
-        if "Contents" in response:
-            print(f"Files in '{self.bucket_name}/{prefix}':")
-            for obj in response['Contents']:
-                print(f"  - {obj['Key']} ({obj['Size']} bytes, {obj['LastModified']})")
+        if use_cache:
+            yield from listing_cache.iter_objects(self.s3, bucket_name, prefix, parallel)
         else:
-            print(f"No files found in '{self.bucket_name}/{prefix}'")
+            yield from iter_objects(self.s3, bucket_name, prefix, parallel)
 
     def upload_file_to_s3(self, s3_key, file_path, bucket_name=None):
         """
@@ -71,19 +93,85 @@ class S3Manager:
             
         try:
             self.s3.upload_file(file_path, bucket_name, s3_key)
+            listing_cache.invalidate(bucket_name, s3_key)
             print(f"✅ Successfully uploaded {file_path} to s3://{bucket_name}/{s3_key}")
             return True
         except Exception as e:
             print(f"❌ Error uploading file to S3: {str(e)}")
             return False
 
-    def read_json_from_s3(self, s3_key, bucket_name=None):
+    def sync_up(self, local_dir, prefix=None, max_workers=DEFAULT_SYNC_WORKERS, bucket_name=None):
+        """
+        Upload the new and changed files of a local directory to S3.
+        
+        Files whose size and ETag (MD5) match the object already on S3 are skipped.
+        
+        Args:
+            local_dir (str): The directory to upload, recursively
+            prefix (str, optional): The S3 prefix mirroring local_dir. If None, uses the instance prefix.
+            max_workers (int): Number of files uploaded at the same time
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if every file was uploaded or unchanged, False otherwise
+        """
+        if prefix is None:
+            prefix = self.prefix
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+
+        try:
+            summary = sync_up(self.s3, bucket_name, local_dir, prefix, max_workers)
+            for s3_key in summary["keys"]:
+                listing_cache.invalidate(bucket_name, s3_key)
+            print(
+                f"✅ Uploaded {summary['transferred']} files ({summary['bytes']} bytes) to s3://{bucket_name}/{prefix}, "
+                f"{summary['skipped']} unchanged, {summary['failed']} failed"
+            )
+            return summary["failed"] == 0
+        except Exception as e:
+            print(f"❌ Error syncing {local_dir} to S3: {str(e)}")
+            return False
+
+    def sync_down(self, local_dir, prefix=None, max_workers=DEFAULT_SYNC_WORKERS, bucket_name=None):
+        """
+        Download the new and changed objects under an S3 prefix to a local directory.
+        
+        Local files whose size and MD5 match the object's ETag are skipped.
+        
+        Args:
+            local_dir (str): The directory mirroring the prefix
+            prefix (str, optional): The S3 prefix to download. If None, uses the instance prefix.
+            max_workers (int): Number of files downloaded at the same time
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if every object was downloaded or unchanged, False otherwise
+        """
+        if prefix is None:
+            prefix = self.prefix
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+
+        try:
+            summary = sync_down(self.s3, bucket_name, prefix, local_dir, max_workers)
+            print(
+                f"✅ Downloaded {summary['transferred']} files ({summary['bytes']} bytes) to {local_dir}, "
+                f"{summary['skipped']} unchanged, {summary['failed']} failed"
+            )
+            return summary["failed"] == 0
+        except Exception as e:
+            print(f"❌ Error syncing s3://{bucket_name}/{prefix} to {local_dir}: {str(e)}")
+            return False
+
+    def read_json_from_s3(self, s3_key, bucket_name=None, use_cache=True):
         """
         Read a JSON object directly from S3 without saving to a file.
         
         Args:
             s3_key (str): The S3 key (path) of the JSON file to read
             bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            use_cache (bool): Reuse the process-wide dataset cache, revalidated by ETag
             
         Returns:
             dict or None: The JSON object if successful, None if there was an error
@@ -92,15 +180,264 @@ class S3Manager:
             bucket_name = self.bucket_name
             
         try:
-            response = self.s3.get_object(Bucket=bucket_name, Key=s3_key)
-            content = response['Body'].read().decode('utf-8')
-            json_obj = json.loads(content)
+            if use_cache:
+                json_obj = dataset_cache.get(self.s3, bucket_name, s3_key)
+            else:
+                response = self.s3.get_object(Bucket=bucket_name, Key=s3_key)
+                content = response['Body'].read().decode('utf-8')
+                json_obj = json.loads(content)
             print(f"✅ Successfully read JSON from s3://{bucket_name}/{s3_key}")
             return json_obj
         except Exception as e:
             print(f"❌ Error reading JSON from S3: {str(e)}")
             return None
 
+    def iter_records_from_s3(self, s3_key, columns=None, bucket_name=None):
+        """
+        Stream the records of a JSON dataset from S3 one at a time.
+        
+        Args:
+            s3_key (str): The S3 key (path) of the JSON dataset to read
+            columns (list, optional): Keep only these keys of each record
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Yields:
+            dict: The records of the dataset's data_deduplicated array
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+
+        response = self.s3.get_object(Bucket=bucket_name, Key=s3_key)
+        yield from iter_json_records(response['Body'], columns=columns)
+
+    def convert_dataset_to_parquet(self, s3_key, output_key=None, row_group_size=DEFAULT_ROW_GROUP_SIZE, bucket_name=None):
+        """
+        Convert a JSON dataset on S3 into a Parquet object with small row groups.
+        
+        The apps page Parquet datasets with byte-range GETs, fetching only the footer and
+        the row groups covering the visible rows.
+        
+        Args:
+            s3_key (str): The S3 key (path) of the JSON dataset to convert
+            output_key (str, optional): The S3 key of the Parquet object. If None, the
+                source key with a .parquet extension is used.
+            row_group_size (int): Number of rows per row group
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if the conversion and upload were successful, False otherwise
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+        if output_key is None:
+            output_key = f"{os.path.splitext(s3_key)[0]}.parquet"
+
+        try:
+            response = self.s3.get_object(Bucket=bucket_name, Key=s3_key)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_path = os.path.join(tmp_dir, os.path.basename(output_key))
+                rows = convert_json_to_parquet(response['Body'], local_path, row_group_size=row_group_size)
+                print(f"✅ Converted {rows} rows from s3://{bucket_name}/{s3_key}")
+                return self.upload_file_to_s3(output_key, local_path, bucket_name)
+        except Exception as e:
+            print(f"❌ Error converting JSON to Parquet: {str(e)}")
+            return False
+
+    def convert_dataset_to_jsonl(self, s3_key, output_key=None, bucket_name=None):
+        """
+        Convert a JSON dataset on S3 into a JSONL object plus its sidecar offset index.
+        
+        The apps page JSONL datasets with two byte-range GETs per page: one for the slice of
+        the index covering the visible rows and one for the rows themselves.
+        
+        Args:
+            s3_key (str): The S3 key (path) of the JSON dataset to convert
+            output_key (str, optional): The S3 key of the JSONL object. If None, the
+                source key with a .jsonl extension is used. The index is stored at
+                output_key + ".idx".
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if the conversion and uploads were successful, False otherwise
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+        if output_key is None:
+            output_key = f"{os.path.splitext(s3_key)[0]}.jsonl"
+
+        try:
+            response = self.s3.get_object(Bucket=bucket_name, Key=s3_key)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local_path = os.path.join(tmp_dir, os.path.basename(output_key))
+                rows = convert_json_to_jsonl(response['Body'], local_path)
+                print(f"✅ Converted {rows} rows from s3://{bucket_name}/{s3_key}")
+                return (
+                    self.upload_file_to_s3(output_key, local_path, bucket_name)
+                    and self.upload_file_to_s3(output_key + JSONL_INDEX_SUFFIX, local_path + JSONL_INDEX_SUFFIX, bucket_name)
+                )
+        except Exception as e:
+            print(f"❌ Error converting JSON to JSONL: {str(e)}")
+            return False
+
+    def build_jsonl_index(self, s3_key, bucket_name=None):
+        """
+        Build the sidecar offset index (row number → byte offset) of a JSONL object on S3.
+        
+        Args:
+            s3_key (str): The S3 key (path) of the JSONL object
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if the index was built and uploaded, False otherwise
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+
+        try:
+            response = self.s3.get_object(Bucket=bucket_name, Key=s3_key)
+            index = build_jsonl_index(response['Body'])
+            index_key = s3_key + JSONL_INDEX_SUFFIX
+            self.s3.put_object(Bucket=bucket_name, Key=index_key, Body=index)
+            print(f"✅ Indexed {len(index) // 8 - 1} rows into s3://{bucket_name}/{index_key}")
+            return True
+        except Exception as e:
+            print(f"❌ Error indexing JSONL object: {str(e)}")
+            return False
+
+    def compact_validation_logs(self, log_root=None, bucket_name=None):
+        """
+        Fold the autosaved validation deltas of every labeler log under log_root into snapshots.
+        
+        Args:
+            log_root (str, optional): The prefix holding the logs. If None, uses
+                "<instance prefix>validation_log/".
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if every log was compacted, False otherwise
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+        if log_root is None:
+            log_root = f"{self.prefix}validation_log/"
+
+        try:
+            log_prefixes = sorted({
+                s3_key.split(DELTAS_DIR)[0]
+                for s3_key in list_keys(self.s3, bucket_name, log_root)
+                if f"/{DELTAS_DIR}" in s3_key
+            })
+            for log_prefix in log_prefixes:
+                compact_log(self.s3, bucket_name, log_prefix)
+            print(f"✅ Compacted {len(log_prefixes)} validation logs under s3://{bucket_name}/{log_root}")
+            return True
+        except Exception as e:
+            print(f"❌ Error compacting validation logs: {str(e)}")
+            return False
+
+    def merge_validated_results(self, kind="pairs", policy="latest", output_key=None,
+                                max_workers=DEFAULT_MAX_WORKERS, compression="gzip", bucket_name=None):
+        """
+        Merge every labeler's validated results into one canonical labeled dataset.
+        
+        The validated_data_pairs_* (or validated_data_*) objects under the instance prefix
+        are downloaded concurrently and joined by id, resolving conflicting validations with
+        the given policy (see validated_results.merge_results).
+        
+        Args:
+            kind (str): "pairs" or "triplets"
+            policy (str): "latest", "majority" or "unanimous"
+            output_key (str, optional): The S3 key of the merged dataset. If None,
+                "<prefix>merged_validated_<kind>_<policy>_<timestamp>.json.gz" is used.
+            max_workers (int): Number of results downloaded at the same time
+            compression (str): "gzip", "zstd" or "none"
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            bool: True if the merged dataset was uploaded, False otherwise
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+        extension, content_type = COMPRESSIONS[compression]
+        if output_key is None:
+            timestamp = pd.Timestamp.now().isoformat()
+            output_key = f"{self.prefix}merged_validated_{kind}_{policy}_{timestamp}{extension}"
+
+        try:
+            results = load_results(self.s3, bucket_name, self.prefix, kind, max_workers)
+            if results.empty:
+                print(f"❌ No validated {kind} results found in '{bucket_name}/{self.prefix}'")
+                return False
+            merged = merge_results(results, policy)
+            print(f"✅ Merged {results['source'].nunique()} results from {results['user'].nunique()} labelers")
+
+            metadata = {
+                "total_rows": len(merged),
+                "validated_rows": int(merged["is_validated"].sum()),
+                "conflict_policy": policy,
+                "sources": sorted(results["source"].unique()),
+                "merged_at": pd.Timestamp.now().isoformat(),
+            }
+            chunks = iter_validated_json_chunks(
+                merged.drop(columns="is_validated"), merged["is_validated"].to_numpy(), metadata
+            )
+            upload_multipart(
+                self.s3, bucket_name, output_key, compress_chunks(chunks, compression), ContentType=content_type
+            )
+            print(f"✅ Uploaded {len(merged)} merged rows to s3://{bucket_name}/{output_key}")
+            return True
+        except Exception as e:
+            print(f"❌ Error merging validated results: {str(e)}")
+            return False
+
+    def report_agreement(self, kind="pairs", max_workers=DEFAULT_MAX_WORKERS, output_path=None, bucket_name=None):
+        """
+        Print the inter-annotator agreement of every labeler's validated results.
+        
+        Args:
+            kind (str): "pairs" or "triplets"
+            max_workers (int): Number of results downloaded at the same time
+            output_path (str, optional): Also write the report to this local JSON file
+            bucket_name (str, optional): The bucket name. If None, uses the instance bucket.
+            
+        Returns:
+            dict or None: The report (see agreement.agreement_report), None if there was an error
+        """
+        if bucket_name is None:
+            bucket_name = self.bucket_name
+
+        try:
+            results = load_results(self.s3, bucket_name, self.prefix, kind, max_workers)
+            if results.empty:
+                print(f"❌ No validated {kind} results found in '{bucket_name}/{self.prefix}'")
+                return None
+            report = agreement_report(results)
+
+            print(f"Annotators: {', '.join(report['annotators'])}")
+            print(f"Rows: {report['rows']} ({report['shared_rows']} rated by several annotators)")
+            print(f"Fleiss' kappa: {report['fleiss_kappa']:.3f}")
+            print("Cohen's kappa by pair of annotators:")
+            print(report["cohen_kappa"].round(3).to_string())
+            print("Least consistent groups:")
+            print(report["groups"].head(20).round(3).to_string())
+            if report["labels"] is not None:
+                print("Disagreement by label:")
+                print(report["labels"].round(3).to_string())
+
+            if output_path:
+                with open(output_path, "w") as f:
+                    json.dump({
+                        **{name: value for name, value in report.items() if not isinstance(value, pd.DataFrame)},
+                        "cohen_kappa": json.loads(report["cohen_kappa"].to_json()),
+                        "groups": json.loads(report["groups"].to_json(orient="index")),
+                        "labels": json.loads(report["labels"].to_json(orient="index")) if report["labels"] is not None else None,
+                    }, f, indent=2)
+                print(f"✅ Wrote the agreement report to {output_path}")
+            return report
+        except Exception as e:
+            print(f"❌ Error computing the agreement report: {str(e)}")
+            return None
+
 # Example usage
 import argparse
 import sys
@@ -114,22 +451,85 @@ def main():
 
     # Subparser for list
     parser_list = subparsers.add_parser('list', help='List files in the S3 folder')
+    parser_list.add_argument('--prefix', type=str, help='Prefix to list (default: the instance prefix)', required=False)
+    parser_list.add_argument('--parallel', action='store_true', help='List the sub-folders of the prefix concurrently')
 
     # Subparser for upload
     parser_upload = subparsers.add_parser('upload', help='Upload a file to S3')
     parser_upload.add_argument('local_path', type=str, help='Local file path to upload')
     parser_upload.add_argument('--s3-key', type=str, help='S3 key (remote path)', required=False)
 
+    # Subparsers for sync-up and sync-down
+    parser_sync_up = subparsers.add_parser('sync-up', help='Upload the new and changed files of a directory')
+    parser_sync_up.add_argument('local_dir', type=str, help='Local directory to upload')
+    parser_sync_up.add_argument('--prefix', type=str, help='S3 prefix (default: the instance prefix)', required=False)
+    parser_sync_up.add_argument('--max-workers', type=int, default=DEFAULT_SYNC_WORKERS,
+                                help=f'Files transferred in parallel (default: {DEFAULT_SYNC_WORKERS})')
+    parser_sync_down = subparsers.add_parser('sync-down', help='Download the new and changed files under a prefix')
+    parser_sync_down.add_argument('local_dir', type=str, help='Local directory to download to')
+    parser_sync_down.add_argument('--prefix', type=str, help='S3 prefix (default: the instance prefix)', required=False)
+    parser_sync_down.add_argument('--max-workers', type=int, default=DEFAULT_SYNC_WORKERS,
+                                  help=f'Files transferred in parallel (default: {DEFAULT_SYNC_WORKERS})')
+
     # Subparser for download/read
     parser_read = subparsers.add_parser('read', help='Read a JSON object from S3')
     parser_read.add_argument('--s3-key', type=str, help='S3 key (remote path)', required=False)
+    parser_read.add_argument('--cache-dir', type=str, help='Directory keeping downloaded objects between runs',
+                             default=os.getenv("DATASET_DISK_CACHE_DIR"))
+
+    # Subparser for convert
+    parser_convert = subparsers.add_parser('convert', help='Convert a JSON dataset on S3 to Parquet or indexed JSONL')
+    parser_convert.add_argument('--s3-key', type=str, help='S3 key (remote path) of the JSON dataset', required=False)
+    parser_convert.add_argument('--output-key', type=str, help='S3 key of the converted object', required=False)
+    parser_convert.add_argument('--format', choices=['parquet', 'jsonl'], default='parquet',
+                                help='Output format (default: parquet)')
+    parser_convert.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                                help=f'Rows per row group (default: {DEFAULT_ROW_GROUP_SIZE})')
+
+    # Subparser for index
+    parser_index = subparsers.add_parser('index', help='Build the offset index of a JSONL object on S3')
+    parser_index.add_argument('s3_key', type=str, help='S3 key (remote path) of the JSONL object')
+
+    # Subparser for compact
+    parser_compact = subparsers.add_parser('compact', help='Fold autosaved validation deltas into snapshots')
+    parser_compact.add_argument('--log-prefix', type=str, help='Prefix holding the validation logs', required=False)
+
+    # Subparser for merge
+    parser_merge = subparsers.add_parser('merge', help='Merge the validated results of every labeler')
+    parser_merge.add_argument('--kind', choices=['pairs', 'triplets'], default='pairs',
+                              help='Which app produced the results (default: pairs)')
+    parser_merge.add_argument('--policy', choices=CONFLICT_POLICIES, default='latest',
+                              help='How conflicting validations are resolved (default: latest)')
+    parser_merge.add_argument('--output-key', type=str, help='S3 key of the merged dataset', required=False)
+    parser_merge.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                              help=f'Results downloaded in parallel (default: {DEFAULT_MAX_WORKERS})')
+    parser_merge.add_argument('--compression', choices=list(COMPRESSIONS), default='gzip',
+                              help='Compression of the merged dataset (default: gzip)')
+
+    # Subparser for agreement
+    parser_agreement = subparsers.add_parser('agreement', help='Report the inter-annotator agreement of the validated results')
+    parser_agreement.add_argument('--kind', choices=['pairs', 'triplets'], default='pairs',
+                                  help='Which app produced the results (default: pairs)')
+    parser_agreement.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                                  help=f'Results downloaded in parallel (default: {DEFAULT_MAX_WORKERS})')
+    parser_agreement.add_argument('--output', type=str, help='Local JSON file to write the report to', required=False)
 
     args = parser.parse_args()
     s3_manager = S3Manager()
 
     if args.command == "list":
         print("=== Listing existing files ===")
-        s3_manager.list_objects_in_folder()
+        prefix = args.prefix or s3_manager.prefix
+        count = 0
+        for record in s3_manager.list_objects_in_folder(prefix, parallel=args.parallel):
+            if count == 0:
+                print(f"Files in '{s3_manager.bucket_name}/{prefix}':")
+            print(f"  - {record['key']} ({record['size']} bytes, {record['last_modified']})")
+            count += 1
+        if count == 0:
+            print(f"No files found in '{s3_manager.bucket_name}/{prefix}'")
+        else:
+            print(f"{count} files")
 
     elif args.command == "upload":
         file_name = os.path.basename(args.local_path)
@@ -141,9 +541,21 @@ def main():
         if not result:
             sys.exit(1)
             
+    elif args.command == "sync-up":
+        print(f"Syncing '{args.local_dir}' to S3...")
+        if not s3_manager.sync_up(args.local_dir, args.prefix, args.max_workers):
+            sys.exit(1)
+
+    elif args.command == "sync-down":
+        print(f"Syncing S3 to '{args.local_dir}'...")
+        if not s3_manager.sync_down(args.local_dir, args.prefix, args.max_workers):
+            sys.exit(1)
+            
     elif args.command == "read":
         s3_key = args.s3_key or f"{s3_manager.prefix}assembled_data.json"
         print(f"Reading JSON from S3 key: {s3_key} ...")
+        if args.cache_dir:
+            dataset_cache.disk_cache = DiskCache(args.cache_dir)
         json_obj = s3_manager.read_json_from_s3(s3_key)
         if json_obj is not None:
             print(json.dumps(json_obj, indent=2))
@@ -152,6 +564,35 @@ def main():
                 json.dump(json_obj, f, indent=2)
         else:
             sys.exit(1)
+
+    elif args.command == "convert":
+        s3_key = args.s3_key or f"{s3_manager.prefix}assembled_data.json"
+        if args.format == "jsonl":
+            print(f"Converting '{s3_key}' to JSONL with an offset index...")
+            result = s3_manager.convert_dataset_to_jsonl(s3_key, args.output_key)
+        else:
+            print(f"Converting '{s3_key}' to Parquet ({args.row_group_size} rows per row group)...")
+            result = s3_manager.convert_dataset_to_parquet(s3_key, args.output_key, args.row_group_size)
+        if not result:
+            sys.exit(1)
+
+    elif args.command == "index":
+        print(f"Indexing JSONL object '{args.s3_key}'...")
+        if not s3_manager.build_jsonl_index(args.s3_key):
+            sys.exit(1)
+    elif args.command == "compact":
+        if not s3_manager.compact_validation_logs(args.log_prefix):
+            sys.exit(1)
+    elif args.command == "merge":
+        print(f"Merging validated {args.kind} results with the '{args.policy}' policy...")
+        if not s3_manager.merge_validated_results(
+            args.kind, args.policy, args.output_key, args.max_workers, args.compression
+        ):
+            sys.exit(1)
+    elif args.command == "agreement":
+        print(f"Computing the agreement of validated {args.kind} results...")
+        if s3_manager.report_agreement(args.kind, args.max_workers, args.output) is None:
+            sys.exit(1)
     else:
         parser.print_help()
 
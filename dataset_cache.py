@@ -0,0 +1,267 @@
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from botocore.exceptions import ClientError
+from rich import print
+
+from disk_cache import DiskCache
+from tracing import tracer
+
+
+# Memory budget for cached datasets, shared by every session served by this process
+DEFAULT_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Optional directory keeping downloaded objects across restarts (see disk_cache.py)
+DISK_CACHE_DIR = os.getenv("DATASET_DISK_CACHE_DIR")
+
+
+def load_json_body(body):
+    """Parse a whole S3 response body as JSON."""
+    with tracer.span("body_read") as span:
+        data = body.read()
+        span["bytes"] = len(data)
+    with tracer.span("json_decode", bytes=len(data)):
+        return json.loads(data.decode('utf-8'))
+
+
+def _is_not_modified(error):
+    """Return True if a ClientError is S3's answer to a satisfied If-None-Match."""
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    code = error.response.get("Error", {}).get("Code")
+    return status == 304 or code in ("304", "NotModified")
+
+
+class DatasetCache:
+    """A process-wide LRU cache of parsed S3 objects, keyed by bucket, key and ETag."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_cache=None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Approximate memory budget; least recently used entries are
+                evicted once the cached values exceed it
+            disk_cache (DiskCache, optional): Keeps the downloaded bodies on disk, so
+                objects not in memory are revalidated against the disk copy instead of
+                being downloaded again
+        """
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self._entries = OrderedDict()
+        # Fetches in progress, so concurrent requests for the same object wait on one
+        self._in_flight = {}
+        self._warmed = set()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+
+    def get(self, s3, bucket_name, s3_key, loader=load_json_body, variant="json", sizeof=None):
+        """
+        Return the parsed object at s3_key, downloading it only if it changed.
+
+        A cached entry is revalidated with a conditional GET (If-None-Match on its ETag):
+        S3 answers 304 when the object is unchanged and the cached value is returned
+        without transferring or parsing the body again. Without an entry in memory, a body
+        kept by the disk cache is revalidated the same way and parsed from disk.
+
+        Concurrent calls for the same object and variant are coalesced: the first one
+        fetches and loads it while the others wait and receive the same value (or error).
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key (path) of the object
+            loader (callable): Turns the streaming response body into the cached value
+            variant (str): Distinguishes different loaders applied to the same object
+            sizeof (callable, optional): Returns the size in bytes of a loaded value.
+                If None, the object's ContentLength is used.
+
+        Returns:
+            The loaded value. It is shared between callers and must not be mutated.
+        """
+        cache_key = (bucket_name, s3_key, variant)
+        with self._lock:
+            flight = self._in_flight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[cache_key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return flight.result()
+
+        try:
+            value = self._fetch(cache_key, s3, bucket_name, s3_key, loader, sizeof)
+            flight.set_result(value)
+            return value
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[cache_key]
+
+    def get_frame(self, s3, bucket_name, s3_key, columns):
+        """
+        Return a JSON dataset as a DataFrame holding only the given columns (see dataset_io.load_frame).
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key (path) of the JSON dataset
+            columns (list): The columns to keep, in order
+
+        Returns:
+            pd.DataFrame: The cached frame. It is shared between callers and must not be mutated.
+        """
+        # Imported on first use, so importing the cache (as the apps do) does not load pandas
+        from dataset_io import frame_nbytes, load_frame
+
+        return self.get(
+            s3, bucket_name, s3_key,
+            loader=lambda body: load_frame(body, columns),
+            variant="frame:" + ",".join(columns),
+            sizeof=frame_nbytes,
+        )
+
+    def warm_up(self, s3, bucket_name, s3_key, columns):
+        """
+        Load a JSON dataset with get_frame on a background thread, once per process.
+
+        A session asking for the dataset while it loads waits for the same fetch.
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key (path) of the JSON dataset
+            columns (list): The columns to keep, in order
+        """
+        warm_key = (bucket_name, s3_key, tuple(columns))
+        with self._lock:
+            if warm_key in self._warmed:
+                return
+            self._warmed.add(warm_key)
+
+        def run():
+            try:
+                df = self.get_frame(s3, bucket_name, s3_key, columns)
+                print(f"✅ Warmed up {len(df)} records from s3://{bucket_name}/{s3_key}")
+            except Exception as e:
+                print(f"❌ Error warming up s3://{bucket_name}/{s3_key}: {str(e)}")
+
+        threading.Thread(target=run, name="dataset-warm-up", daemon=True).start()
+
+    def _fetch(self, cache_key, s3, bucket_name, s3_key, loader, sizeof):
+        """Revalidate or download an object and load it into the cache (see get)."""
+        with self._lock:
+            entry = self._entries.get(cache_key)
+
+        disk_etag = None
+        if entry is None and self.disk_cache is not None:
+            disk_etag = self.disk_cache.etag(bucket_name, s3_key)
+
+        request = {"Bucket": bucket_name, "Key": s3_key}
+        if entry is not None:
+            request["IfNoneMatch"] = entry["etag"]
+        elif disk_etag is not None:
+            request["IfNoneMatch"] = disk_etag
+
+        body = None
+        with tracer.span("s3_get", key=s3_key, conditional="IfNoneMatch" in request) as span:
+            try:
+                response = s3.get_object(**request)
+                span["bytes"] = response.get("ContentLength", 0)
+            except ClientError as e:
+                if "IfNoneMatch" not in request or not _is_not_modified(e):
+                    raise
+                span["not_modified"] = True
+                response = None
+
+        if response is None:
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                    if cache_key in self._entries:
+                        self._entries.move_to_end(cache_key)
+                return entry["value"]
+            try:
+                body = self.disk_cache.open(disk_etag)
+            except FileNotFoundError:
+                # Evicted by another process since it was looked up
+                response = s3.get_object(Bucket=bucket_name, Key=s3_key)
+            else:
+                etag = disk_etag
+                content_length = len(body) if isinstance(body, mmap.mmap) else 0
+                with self._lock:
+                    self.disk_hits += 1
+
+        if body is None:
+            etag = response["ETag"]
+            content_length = response.get("ContentLength", 0)
+            if self.disk_cache is not None:
+                body = self.disk_cache.store(bucket_name, s3_key, etag, response['Body'])
+            else:
+                body = response['Body']
+            with self._lock:
+                self.misses += 1
+
+        try:
+            value = loader(body)
+            size = sizeof(value) if sizeof is not None else content_length
+        finally:
+            body.close()
+        with self._lock:
+            self._store(cache_key, {"etag": etag, "value": value, "size": size})
+        return value
+
+    def _store(self, cache_key, entry):
+        """Insert an entry and evict least recently used ones until the budget is met."""
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            self._current_bytes -= previous["size"]
+        if entry["size"] > self.max_bytes:
+            return
+
+        self._entries[cache_key] = entry
+        self._current_bytes += entry["size"]
+        while self._current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= evicted["size"]
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, number of entries and bytes used, hits
+                revalidated against the disk cache and requests coalesced into another
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_hits": self.disk_hits,
+                "coalesced": self.coalesced,
+            }
+
+
+# Imported modules are shared by every Streamlit session, so this instance is process-wide
+dataset_cache = DatasetCache(disk_cache=DiskCache(DISK_CACHE_DIR) if DISK_CACHE_DIR else None)
@@ -0,0 +1,321 @@
+import re
+import threading
+import weakref
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from tracing import tracer
+
+
+# Words of the sentence columns: runs of letters, digits and underscores (as Python's \w),
+# split from the lowercased text by the pattern of their separators
+TOKEN_PATTERN = r"\w+"
+_SEPARATOR_PATTERN = r"[^\pL\pN_]+"
+DEFAULT_SEARCH_LIMIT = 100
+# Sorts after every other character, so [prefix, prefix + _MAX_CHAR) holds the words starting with prefix
+_MAX_CHAR = "\U0010ffff"
+
+
+def tokenize(text):
+    """Split a text into the lowercased words the text index is built from."""
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+
+def _column_words(column):
+    """
+    Split a text column into words with Arrow compute kernels, without a Python call per row.
+
+    Args:
+        column (pd.Series): The text column
+
+    Returns:
+        tuple: The words (pyarrow array) and the row of each word (np.ndarray)
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    text = pc.utf8_lower(pa.array(column.astype("string[pyarrow]")))
+    words = pc.split_pattern(pc.replace_substring_regex(text, _SEPARATOR_PATTERN, " "), " ")
+    rows = pc.list_parent_indices(words)
+    words = pc.list_flatten(words)
+    # Leading and trailing separators leave empty words
+    keep = pc.not_equal(words, "")
+    return words.filter(keep), rows.filter(keep).to_numpy()
+
+
+def _postings(codes, rows, size, num_rows):
+    """
+    Group row numbers by code, as in a CSR matrix, dropping repeated (code, row) pairs.
+
+    Args:
+        codes (np.ndarray): The code of each entry, in [0, size)
+        rows (np.ndarray): The row of each entry, in [0, num_rows)
+        size (int): Number of distinct codes
+        num_rows (int): Number of rows
+
+    Returns:
+        tuple: The rows sorted by code, and offsets such that the rows of code c are
+            rows[offsets[c]:offsets[c + 1]], in ascending order
+    """
+    # Sorting one int64 key per entry is much faster than an argsort on two keys
+    num_rows = max(num_rows, 1)
+    keys = np.sort(codes.astype(np.int64) * num_rows + rows)
+    if len(keys):
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    offsets = np.searchsorted(keys, np.arange(size + 1, dtype=np.int64) * num_rows)
+    return (keys % num_rows).astype(np.int32), offsets
+
+
+class GroupIndex:
+    """
+    The rows of each group_id, as offsets into the rows stably sorted by group.
+
+    Groups are numbered in order of first appearance, so the previous or next group of
+    a group is one code away and its rows are one slice of the sorted rows.
+    """
+
+    def __init__(self, group_ids):
+        """
+        Build the index of a group_id column.
+
+        Args:
+            group_ids (pd.Series): The group_id of every row; rows without one belong to no group
+        """
+        codes, groups = pd.factorize(group_ids)
+        self.num_rows = len(codes)
+        # Group code of every row (-1 for none); shared read-only with the validation states
+        self.codes = codes.astype(np.int32)
+        self.codes.flags.writeable = False
+        self.groups = pd.Index(np.asarray(groups).astype(str))
+        known = codes >= 0
+        self.rows, self.offsets = _postings(codes[known], np.flatnonzero(known), len(self.groups), self.num_rows)
+
+    def __len__(self):
+        return len(self.groups)
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the index."""
+        return int(self.codes.nbytes + self.groups.memory_usage(deep=True) + self.rows.nbytes + self.offsets.nbytes)
+
+    def find(self, group_id):
+        """Return the code of a group, or -1 if there is no such group."""
+        return int(self.groups.get_indexer([str(group_id)])[0])
+
+    def rows_of(self, code):
+        """Return the rows of a group, in ascending order."""
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+
+class DatasetIndex:
+    """Hash indexes on id and group_id and an inverted word index over the sentence columns of a dataset."""
+
+    def __init__(self, df, text_columns, groups=None):
+        """
+        Build the indexes of a dataset.
+
+        Args:
+            df (pd.DataFrame): The dataset, with `id` and `group_id` columns
+            text_columns (list): The sentence columns searched by text
+            groups (GroupIndex, optional): The index of the group_id column, if already built
+        """
+        self.num_rows = len(df)
+        self.ids = pd.Index(df["id"])
+        self.groups = groups if groups is not None else GroupIndex(df["group_id"])
+
+        # Rows of each word of the sentence columns, with the words sorted for prefix lookups
+        words, rows = [], []
+        for column in text_columns:
+            column_words, column_rows = _column_words(df[column])
+            words.append(column_words)
+            rows.append(column_rows)
+        if words:
+            import pyarrow as pa
+
+            encoded = pa.chunked_array(words).combine_chunks().dictionary_encode()
+            word_codes = encoded.indices.to_numpy()
+            vocabulary = encoded.dictionary.to_numpy(zero_copy_only=False)
+            rows = np.concatenate(rows)
+        else:
+            word_codes = np.array([], dtype=np.int64)
+            vocabulary = np.array([], dtype=object)
+            rows = np.array([], dtype=np.int64)
+        # Codes are renumbered in word order
+        order = np.argsort(vocabulary)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        self.vocabulary = vocabulary[order]
+        self.word_rows, self.word_offsets = _postings(
+            rank[word_codes], rows, len(self.vocabulary), self.num_rows
+        )
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the indexes."""
+        return int(
+            self.ids.memory_usage() + self.groups.nbytes
+            + self.word_rows.nbytes + self.word_offsets.nbytes
+            + sum(len(word) + 49 for word in self.vocabulary)
+        )
+
+    def find_id(self, value):
+        """
+        Return the rows whose id is value.
+
+        Args:
+            value (str): The id as typed; converted to the type of the id column
+
+        Returns:
+            np.ndarray: The matching rows, in ascending order
+        """
+        if pd.api.types.is_integer_dtype(self.ids.dtype):
+            try:
+                value = int(value)
+            except ValueError:
+                return np.array([], dtype=np.int64)
+        rows = self.ids.get_indexer_non_unique([value])[0]
+        return np.sort(rows[rows >= 0])
+
+    def find_group(self, group_id):
+        """Return the rows of a group, in ascending order (empty if there is no such group)."""
+        code = self.groups.find(group_id)
+        if code < 0:
+            return np.array([], dtype=np.int32)
+        return self.groups.rows_of(code)
+
+    def find_words(self, text):
+        """
+        Return the rows holding every word of a text in their sentence columns.
+
+        The last word also matches longer words starting with it, so results follow the
+        text as it is being typed.
+
+        Args:
+            text (str): The words to look for
+
+        Returns:
+            np.ndarray: The matching rows, in ascending order
+        """
+        words = tokenize(text)
+        if not words:
+            return np.array([], dtype=np.int32)
+
+        matches = []
+        for i, word in enumerate(words):
+            first = np.searchsorted(self.vocabulary, word, side="left")
+            if i == len(words) - 1:
+                last = np.searchsorted(self.vocabulary, word + _MAX_CHAR, side="left")
+            else:
+                last = first + 1 if first < len(self.vocabulary) and self.vocabulary[first] == word else first
+            # The words of [first, last) are consecutive, so their rows are one slice
+            rows = self.word_rows[self.word_offsets[first]:self.word_offsets[last]]
+            if last - first > 1:
+                rows = np.unique(rows)
+            matches.append(rows)
+
+        matches.sort(key=len)
+        rows = matches[0]
+        for other in matches[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def search(self, field, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find rows by id, group or sentence text.
+
+        Args:
+            field (str): "id", "group_id" or "text"
+            query (str): The id, the group id or the words to look for
+            limit (int): Maximum number of rows returned
+
+        Returns:
+            tuple: The first matching rows (at most limit, in ascending order) and the
+                total number of matches
+        """
+        query = query.strip()
+        if field == "id":
+            rows = self.find_id(query)
+        elif field == "group_id":
+            rows = self.find_group(query)
+        elif field == "text":
+            rows = self.find_words(query)
+        else:
+            raise ValueError(f"Unknown search field: {field}")
+        return rows[:limit], len(rows)
+
+
+class IndexCache:
+    """
+    Dataset indexes shared by every session of this process, built once per dataset version.
+
+    Indexes are keyed by the DataFrame they were built from. The dataset cache hands the
+    same DataFrame to every session until the object changes on S3, so each version is
+    indexed once, and its index is dropped along with the DataFrame.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, df, text_columns):
+        """
+        Return the search index of a DataFrame, building it on first use.
+
+        Args:
+            df (pd.DataFrame): The dataset
+            text_columns (list): The sentence columns searched by text
+
+        Returns:
+            DatasetIndex: The shared index
+        """
+        return self._get(
+            df, ("search", tuple(text_columns)), lambda: DatasetIndex(df, text_columns, self.get_groups(df))
+        )
+
+    def get_groups(self, df):
+        """
+        Return the group index of a DataFrame, building it on first use.
+
+        Args:
+            df (pd.DataFrame): The dataset, with a `group_id` column
+
+        Returns:
+            GroupIndex: The shared index
+        """
+        return self._get(df, ("groups",), lambda: GroupIndex(df["group_id"]))
+
+    def _get(self, df, name, build):
+        """Return an index of a DataFrame; concurrent calls for the same one wait for a single build."""
+        cache_key = (id(df),) + name
+        with self._lock:
+            flight = self._indexes.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._indexes[cache_key] = Future()
+                weakref.finalize(df, self._forget, cache_key)
+        if not leader:
+            return flight.result()
+
+        try:
+            with tracer.span("index_build", index=name[0], rows=len(df)) as span:
+                index = build()
+                span["bytes"] = index.nbytes
+        except BaseException as e:
+            flight.set_exception(e)
+            self._forget(cache_key)
+            raise
+        flight.set_result(index)
+        return index
+
+    def _forget(self, cache_key):
+        with self._lock:
+            self._indexes.pop(cache_key, None)
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+# Imported modules are shared by every Streamlit session, so this instance is process-wide
+index_cache = IndexCache()
@@ -0,0 +1,724 @@
+import bisect
+import codecs
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from tracing import TimedReader, tracer
+
+
+# Columns each labeling page needs from the assembled datasets
+PAIRS_COLUMNS = ["id", "group_id", "sentence1", "sentence2", "label"]
+TRIPLETS_COLUMNS = ["id", "group_id", "anchor_sentence", "opposite_sentence", "same_meaning_sentence"]
+# Sentence columns of each dataset, searched by text
+PAIRS_TEXT_COLUMNS = ["sentence1", "sentence2"]
+TRIPLETS_TEXT_COLUMNS = ["anchor_sentence", "opposite_sentence", "same_meaning_sentence"]
+
+# Low-cardinality columns stored as categoricals
+CATEGORICAL_COLUMNS = ("group_id",)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Small row groups keep the byte range needed for one page of rows small
+DEFAULT_ROW_GROUP_SIZE = 1000
+# Sidecar offset index of a JSONL dataset: little-endian uint64 byte offsets of every
+# row followed by the size of the object, stored next to it as "<key>.idx"
+JSONL_INDEX_SUFFIX = ".idx"
+_OFFSET_DTYPE = np.dtype("<u8")
+# Threads reading pages of remote datasets ahead of the labelers, shared by every session
+PAGE_PREFETCH_WORKERS = int(os.getenv("PAGE_PREFETCH_WORKERS", "8"))
+# Pages kept in memory per session, including the ones read ahead
+DEFAULT_PREFETCH_PAGES = 8
+_WHITESPACE = " \t\n\r"
+
+
+class _JSONStream:
+    """Incrementally decode JSON values from a file-like byte stream."""
+
+    def __init__(self, body, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Append the next chunk to the buffer, dropping what has already been consumed."""
+        chunk = self.body.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + self.utf8.decode(chunk or b"", final=not chunk)
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at end of stream)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be char."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'end of data'}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode and consume the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_records(body, field="data_deduplicated", columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the records of a JSON dataset one at a time without loading the whole document.
+
+    The document must be an object whose `field` member is an array of objects, as in the
+    assembled_data*.json files. Other top-level members are decoded and skipped.
+
+    Args:
+        body: A file-like object with a read(size) method, such as a boto3 StreamingBody
+        field (str): The top-level member holding the records
+        columns (list, optional): Keep only these keys of each record. If None, records
+            are yielded unchanged.
+        chunk_size (int): Number of bytes read from the body at a time
+
+    Yields:
+        dict: One record at a time
+
+    Raises:
+        ValueError: If the document is malformed, has no `field` array or a record is
+            missing one of the requested columns
+    """
+    stream = _JSONStream(body, chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        raise ValueError(f"JSON object has no '{field}' member")
+
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key != field:
+            stream.value()
+        else:
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                while True:
+                    record = stream.value()
+                    if columns is None:
+                        yield record
+                    else:
+                        try:
+                            yield {column: record[column] for column in columns}
+                        except (KeyError, TypeError) as e:
+                            raise ValueError(f"Record is missing column {e}") from None
+                    if stream.peek() == "]":
+                        stream.pos += 1
+                        break
+                    stream.expect(",")
+            return
+
+        if stream.peek() == "}":
+            raise ValueError(f"JSON object has no '{field}' member")
+        stream.expect(",")
+
+
+def load_frame(body, columns, field="data_deduplicated", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream a JSON dataset into a DataFrame holding only the given columns.
+
+    Records are appended to per-column lists as they are decoded, so the raw bytes, the
+    decoded text and the full parsed document are never held in memory at once.
+
+    Args:
+        body: A file-like object with a read(size) method, such as a boto3 StreamingBody
+        columns (list): The columns to keep, in order
+        field (str): The top-level member holding the records
+        chunk_size (int): Number of bytes read from the body at a time
+
+    Returns:
+        pd.DataFrame: The projected records, with compact dtypes (see compact_series)
+    """
+    data = {column: [] for column in columns}
+    appenders = [(column, data[column].append) for column in columns]
+    # Reading and decoding are interleaved, so the time spent in read() is taken out of the decode span
+    body = TimedReader(body)
+    start = time.perf_counter()
+    for record in iter_json_records(body, field, columns, chunk_size):
+        for column, append in appenders:
+            append(record[column])
+    rows = len(data[columns[0]]) if columns else 0
+    tracer.record("body_read", body.seconds, bytes=body.bytes)
+    tracer.record("json_decode", time.perf_counter() - start - body.seconds, bytes=body.bytes, rows=rows)
+
+    with tracer.span("dataframe_build", rows=rows, columns=len(columns)):
+        # Convert one column at a time so only one list of Python objects is duplicated at once
+        df = pd.DataFrame(index=pd.RangeIndex(rows))
+        for column in columns:
+            df[column] = compact_series(pd.Series(data.pop(column)), column in CATEGORICAL_COLUMNS)
+    return df
+
+
+def compact_series(series, categorical=False):
+    """
+    Return a series converted to the most compact dtype that preserves its values.
+
+    Integers are downcast to the smallest integer type (int8 for 0/1 labels), string columns
+    without missing values become Arrow-backed strings, and categorical columns become
+    pandas categoricals. Booleans and mixed columns are left unchanged.
+
+    Args:
+        series (pd.Series): The column to convert
+        categorical (bool): Store the column as a categorical
+
+    Returns:
+        pd.Series: The converted column
+    """
+    if categorical:
+        return series.astype("category")
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if series.dtype == object and pd.api.types.infer_dtype(series, skipna=False) == "string":
+        return series.astype("string[pyarrow]")
+    return series
+
+
+def compact_frame(df):
+    """Return a DataFrame with every column converted by compact_series."""
+    return pd.DataFrame(
+        {column: compact_series(df[column], column in CATEGORICAL_COLUMNS) for column in df.columns},
+        index=df.index,
+    )
+
+
+def frame_nbytes(df):
+    """Return the memory used by a DataFrame, including the contents of object columns."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def convert_json_to_parquet(body, output_path, columns=None, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """
+    Stream a JSON dataset into a Parquet file with small row groups.
+
+    Each batch of records is first spooled to a temporary file next to the output, so the
+    schema of the Parquet file can be unified over every record, not inferred from the
+    first batch alone: a column that is null in the first rows gets the type of its later
+    values, and keys that first appear later are kept (null in the earlier rows).
+
+    Args:
+        body: A file-like object with a read(size) method holding the JSON dataset
+        output_path (str): The local Parquet file to write
+        columns (list, optional): The columns to keep. If None, all keys of the records are kept.
+        row_group_size (int): Number of rows per row group
+
+    Returns:
+        int: The number of rows written
+
+    Raises:
+        pyarrow.ArrowTypeError: If a column holds values of incompatible types, such as
+            numbers in some records and strings in others
+    """
+    # Imported on first use, so the apps only load pyarrow when they touch Parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    total = 0
+    batch = []
+    schemas = []
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as spool_dir:
+
+        def spool():
+            nonlocal total
+            # from_pylist would only keep the keys of the first record
+            names = dict.fromkeys(key for record in batch for key in record)
+            table = pa.table({name: [record.get(name) for record in batch] for name in names})
+            pq.write_table(table, os.path.join(spool_dir, f"{len(schemas):08d}.parquet"))
+            schemas.append(table.schema)
+            total += len(batch)
+            batch.clear()
+
+        for record in iter_json_records(body, columns=columns):
+            batch.append(record)
+            if len(batch) == row_group_size:
+                spool()
+        if batch:
+            spool()
+
+        if not schemas:
+            pq.write_table(pa.table({column: [] for column in columns or []}), output_path)
+            return 0
+
+        # Null columns take the type of the other batches, and ints are widened to floats
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+        # Page reads never filter on statistics, and leaving them out keeps the footer small
+        with pq.ParquetWriter(output_path, schema, write_statistics=False) as writer:
+            for i in range(len(schemas)):
+                table = pq.read_table(os.path.join(spool_dir, f"{i:08d}.parquet"))
+                writer.write_table(_conform_table(table, schema), row_group_size=row_group_size)
+    return total
+
+
+def _conform_table(table, schema):
+    """Cast a table to a schema, adding the columns it lacks as nulls."""
+    import pyarrow as pa
+
+    arrays = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(len(table), field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def convert_json_to_jsonl(body, output_path, columns=None):
+    """
+    Stream a JSON dataset into a JSONL file and write its offset index next to it.
+
+    Args:
+        body: A file-like object with a read(size) method holding the JSON dataset
+        output_path (str): The local JSONL file to write; the index is written to
+            output_path + JSONL_INDEX_SUFFIX
+        columns (list, optional): The columns to keep. If None, all keys of the records are kept.
+
+    Returns:
+        int: The number of rows written
+    """
+    offsets = []
+    position = 0
+    with open(output_path, "wb") as f:
+        for record in iter_json_records(body, columns=columns):
+            line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+            offsets.append(position)
+            f.write(line)
+            position += len(line)
+    offsets.append(position)
+    with open(output_path + JSONL_INDEX_SUFFIX, "wb") as f:
+        f.write(np.asarray(offsets, dtype=_OFFSET_DTYPE).tobytes())
+    return len(offsets) - 1
+
+
+def build_jsonl_index(body, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Build the offset index of a JSONL stream, one entry per non-empty line.
+
+    Args:
+        body: A file-like object with a read(size) method holding the JSONL data
+        chunk_size (int): Number of bytes read from the body at a time
+
+    Returns:
+        bytes: The index, in the format of the JSONL_INDEX_SUFFIX sidecar
+    """
+    offsets = []
+    pending = b""
+    pending_start = 0
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk
+        start = 0
+        while True:
+            newline = data.find(b"\n", start)
+            if newline == -1:
+                break
+            if data[start:newline].strip():
+                offsets.append(pending_start + start)
+            start = newline + 1
+        pending = data[start:]
+        pending_start += start
+    if pending.strip():
+        offsets.append(pending_start)
+    offsets.append(pending_start + len(pending))
+    return np.asarray(offsets, dtype=_OFFSET_DTYPE).tobytes()
+
+
+def _parse_jsonl(data, columns):
+    """Parse JSONL bytes into a DataFrame holding only the given columns."""
+    records = [json.loads(line) for line in data.splitlines() if line.strip()]
+    return pd.DataFrame(
+        {column: [record[column] for record in records] for column in columns},
+        columns=columns,
+    )
+
+
+class S3RangeFile(io.RawIOBase):
+    """A read-only, seekable file over an S3 object that fetches bytes with Range GETs."""
+
+    def __init__(self, s3, bucket_name, s3_key, size=None):
+        """
+        Open an S3 object for random access.
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key (path) of the object
+            size (int, optional): The object size. If None, it is fetched with a HEAD request.
+        """
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.size = size if size is not None else s3.head_object(Bucket=bucket_name, Key=s3_key)["ContentLength"]
+        self.position = 0
+        self.bytes_fetched = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self.position
+
+    def read_range(self, start, end):
+        """Return the bytes in [start, end) of the object with a single GET."""
+        end = min(end, self.size)
+        if start >= end:
+            return b""
+        response = self.s3.get_object(Bucket=self.bucket_name, Key=self.s3_key, Range=f"bytes={start}-{end - 1}")
+        data = response['Body'].read()
+        self.bytes_fetched += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read_range(self.position, self.position + len(buffer))
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+class FrameDataset:
+    """A labeling dataset held entirely in memory."""
+
+    is_remote = False
+
+    def __init__(self, df):
+        self.df = df
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    def read_rows(self, start, end):
+        """Return rows [start, end) as a DataFrame."""
+        return self.df.iloc[start:end]
+
+    def to_frame(self):
+        """Return the whole dataset as a DataFrame."""
+        return self.df
+
+
+class ParquetS3Dataset:
+    """A labeling dataset paged from a Parquet object on S3, one row group at a time."""
+
+    is_remote = True
+
+    def __init__(self, s3, bucket_name, s3_key, columns, cached_row_groups=4):
+        """
+        Open a Parquet dataset; only the footer is fetched.
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key (path) of the Parquet object
+            columns (list): The columns to read
+            cached_row_groups (int): Number of recently read row groups kept in memory
+        """
+        import pyarrow.parquet as pq
+
+        self.file = S3RangeFile(s3, bucket_name, s3_key)
+        self.parquet = pq.ParquetFile(self.file)
+        self._columns = columns
+        self.cached_row_groups = cached_row_groups
+        # Row groups read or being read, as futures, so a row group is fetched once
+        self._row_groups = {}
+        self._frame = None
+        self._lock = threading.Lock()
+        self._frame_lock = threading.Lock()
+        # The Parquet reader seeks its file, so each thread reads through its own
+        self._local = threading.local()
+
+        # First row of every row group, used to map a row range to the row groups covering it
+        metadata = self.parquet.metadata
+        self.row_group_starts = []
+        start = 0
+        for i in range(metadata.num_row_groups):
+            self.row_group_starts.append(start)
+            start += metadata.row_group(i).num_rows
+        self.num_rows = start
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def _parquet_file(self):
+        """Return this thread's reader of the object, sharing the footer already fetched."""
+        parquet = getattr(self._local, "parquet", None)
+        if parquet is None:
+            import pyarrow.parquet as pq
+
+            file = S3RangeFile(self.file.s3, self.file.bucket_name, self.file.s3_key, size=self.file.size)
+            parquet = self._local.parquet = pq.ParquetFile(file, metadata=self.parquet.metadata)
+        return parquet
+
+    def _read_row_group(self, index):
+        """
+        Return one row group as a DataFrame, fetching it only if it is not cached.
+
+        The lock is only held to look up the cache, so a page shown is not held up by a
+        read-ahead of other row groups; concurrent reads of the same row group wait for a
+        single fetch.
+        """
+        with self._lock:
+            flight = self._row_groups.get(index)
+            leader = flight is None
+            if leader:
+                if len(self._row_groups) >= self.cached_row_groups:
+                    self._row_groups.pop(next(iter(self._row_groups)))
+                flight = self._row_groups[index] = Future()
+        if not leader:
+            return flight.result()
+
+        try:
+            frame = self._parquet_file().read_row_group(index, columns=self._columns).to_pandas()
+        except BaseException as e:
+            flight.set_exception(e)
+            with self._lock:
+                if self._row_groups.get(index) is flight:
+                    del self._row_groups[index]
+            raise
+        flight.set_result(frame)
+        return frame
+
+    def read_rows(self, start, end):
+        """Return rows [start, end) as a DataFrame, fetching only the row groups covering them."""
+        end = min(end, self.num_rows)
+        if self._frame is not None:
+            return self._frame.iloc[start:end]
+        if start >= end:
+            return pd.DataFrame(columns=self._columns)
+
+        first = bisect.bisect_right(self.row_group_starts, start) - 1
+        last = bisect.bisect_right(self.row_group_starts, end - 1) - 1
+        frames = [self._read_row_group(i) for i in range(first, last + 1)]
+        offset = start - self.row_group_starts[first]
+        page = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return page.iloc[offset:offset + end - start].reset_index(drop=True)
+
+    def to_frame(self):
+        """Return the whole dataset as a DataFrame, downloading every row group once."""
+        # A separate lock, so pages keep being read while the whole dataset downloads
+        with self._frame_lock:
+            if self._frame is None:
+                self._frame = compact_frame(self._parquet_file().read(columns=self._columns).to_pandas())
+                with self._lock:
+                    self._row_groups.clear()
+        return self._frame
+
+
+class JsonlS3Dataset:
+    """A labeling dataset paged from a JSONL object on S3 through its sidecar offset index."""
+
+    is_remote = True
+
+    def __init__(self, s3, bucket_name, s3_key, columns):
+        """
+        Open a JSONL dataset; only the size of its offset index is fetched.
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key (path) of the JSONL object; its index is expected
+                at s3_key + JSONL_INDEX_SUFFIX
+            columns (list): The columns to read
+        """
+        self.file = S3RangeFile(s3, bucket_name, s3_key)
+        self.index = S3RangeFile(s3, bucket_name, s3_key + JSONL_INDEX_SUFFIX)
+        self._columns = columns
+        self._frame = None
+        self.num_rows = self.index.size // _OFFSET_DTYPE.itemsize - 1
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def read_rows(self, start, end):
+        """Return rows [start, end) as a DataFrame with two Range GETs: the index slice and the rows."""
+        end = min(end, self.num_rows)
+        if self._frame is not None:
+            return self._frame.iloc[start:end]
+        if start >= end:
+            return pd.DataFrame(columns=self._columns)
+
+        item_size = _OFFSET_DTYPE.itemsize
+        offsets = np.frombuffer(self.index.read_range(start * item_size, (end + 1) * item_size), dtype=_OFFSET_DTYPE)
+        data = self.file.read_range(int(offsets[0]), int(offsets[-1]))
+        return _parse_jsonl(data, self._columns)
+
+    def to_frame(self):
+        """Return the whole dataset as a DataFrame, downloading the object once."""
+        if self._frame is None:
+            self._frame = compact_frame(_parse_jsonl(self.file.read_range(0, self.file.size), self._columns))
+        return self._frame
+
+
+_prefetch_pool = ThreadPoolExecutor(PAGE_PREFETCH_WORKERS, thread_name_prefix="page-prefetch")
+
+
+class PagePrefetcher:
+    """
+    Pages of a remote dataset read ahead on a shared thread pool, with a bounded cache per session.
+
+    After a page is shown, its neighbours are read in the background, so flipping to them
+    does not wait on S3. Pages are kept as futures: a page still being read is waited on
+    instead of being read twice.
+    """
+
+    def __init__(self, dataset, rows_per_page, max_pages=DEFAULT_PREFETCH_PAGES):
+        """
+        Initialize an empty page cache.
+
+        Args:
+            dataset: A dataset with read_rows(start, end), such as ParquetS3Dataset or JsonlS3Dataset
+            rows_per_page (int): Number of rows per page
+            max_pages (int): Pages kept in memory; least recently used ones are dropped
+        """
+        self.dataset = dataset
+        self.rows_per_page = rows_per_page
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def num_pages(self):
+        return (len(self.dataset) + self.rows_per_page - 1) // self.rows_per_page
+
+    def __contains__(self, page):
+        with self._lock:
+            return page in self._pages
+
+    def _read(self, page):
+        start = (page - 1) * self.rows_per_page
+        return self.dataset.read_rows(start, min(start + self.rows_per_page, len(self.dataset)))
+
+    def _insert(self, page, future):
+        """Cache a page and drop least recently used ones beyond max_pages (lock held)."""
+        self._pages[page] = future
+        self._pages.move_to_end(page)
+        while len(self._pages) > self.max_pages:
+            _, evicted = self._pages.popitem(last=False)
+            evicted.cancel()
+
+    def get(self, page):
+        """
+        Return the rows of a page (1-based), read ahead or read now.
+
+        Returns:
+            pd.DataFrame: The page rows
+        """
+        with self._lock:
+            future = self._pages.get(page)
+            if future is not None and not future.cancelled():
+                self._pages.move_to_end(page)
+                self.hits += 1
+            else:
+                future = None
+                self.misses += 1
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                # A failed read-ahead (such as a transient S3 error) is dropped and the page read again
+                with self._lock:
+                    if self._pages.get(page) is future:
+                        del self._pages[page]
+                    self.hits -= 1
+                    self.misses += 1
+
+        # Read on the calling thread, so the page shown never queues behind read-aheads
+        rows = self._read(page)
+        done = Future()
+        done.set_result(rows)
+        with self._lock:
+            self._insert(page, done)
+        return rows
+
+    def prefetch(self, pages):
+        """
+        Start reading pages in the background unless they are cached or out of range.
+
+        Args:
+            pages (iterable): The pages (1-based) to read ahead, most wanted first
+        """
+        with self._lock:
+            for page in pages:
+                if 1 <= page <= self.num_pages and page not in self._pages:
+                    self._insert(page, _prefetch_pool.submit(self._read, page))
+
+    def cancel(self):
+        """
+        Cancel the read-aheads that have not started yet, such as when jumping to a distant page.
+
+        Reads already running finish and stay cached; pages already read are kept.
+        """
+        with self._lock:
+            for page, future in list(self._pages.items()):
+                if not future.done() and future.cancel():
+                    del self._pages[page]
+
+    def stats(self):
+        """Return the page hits and misses and the number of cached pages."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "pages": len(self._pages)}
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+
+
+# Disk budget of the cache directory; least recently used objects are deleted beyond it
+DEFAULT_DISK_MAX_BYTES = int(os.getenv("DATASET_DISK_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+
+
+class DiskCache:
+    """
+    A content-addressed cache of S3 objects in a local directory, surviving restarts.
+
+    Object bodies are stored once per ETag under `blobs/`, and `refs/` records the ETag last
+    seen for each bucket and key so it can be revalidated with a conditional GET. Files are
+    written to a temporary name and renamed into place, so a crash never leaves a partial
+    entry, and several processes can share the directory.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_DISK_MAX_BYTES):
+        """
+        Initialize the cache, creating its directory if needed.
+
+        Args:
+            directory (str): The cache directory
+            max_bytes (int): Disk budget; least recently used objects are deleted once the
+                cached bodies exceed it
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.blobs_dir = os.path.join(directory, "blobs")
+        self.refs_dir = os.path.join(directory, "refs")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _ref_path(self, bucket_name, s3_key):
+        digest = hashlib.sha256(f"{bucket_name}/{s3_key}".encode('utf-8')).hexdigest()
+        return os.path.join(self.refs_dir, digest)
+
+    def _blob_path(self, etag):
+        # Refs keep the quoted ETag S3 returns; blobs are named by its bare value
+        return os.path.join(self.blobs_dir, etag.strip('"'))
+
+    def _write_atomic(self, path, write):
+        """Write a file through a temporary file renamed into place."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def etag(self, bucket_name, s3_key):
+        """Return the ETag of the cached body of an object, or None if it is not cached."""
+        try:
+            with open(self._ref_path(bucket_name, s3_key)) as f:
+                etag = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return etag if os.path.exists(self._blob_path(etag)) else None
+
+    def open(self, etag):
+        """
+        Open a cached body as a read-only memory map.
+
+        Args:
+            etag (str): The ETag of the body
+
+        Returns:
+            A file-like object over the body; close it once read
+
+        Raises:
+            FileNotFoundError: If the body was evicted
+        """
+        path = self._blob_path(etag)
+        with open(path, "rb") as f:
+            # Mark the body as recently used for eviction
+            os.utime(path)
+            if os.fstat(f.fileno()).st_size == 0:
+                return io.BytesIO(b"")
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def store(self, bucket_name, s3_key, etag, body):
+        """
+        Save an object body streamed from S3 and open it like open().
+
+        Args:
+            bucket_name (str): The S3 bucket name
+            s3_key (str): The S3 key of the object
+            etag (str): The ETag of the body
+            body: A file-like object with a read(size) method, such as a boto3 StreamingBody
+
+        Returns:
+            A file-like object over the saved body; close it once read
+        """
+        self._write_atomic(self._blob_path(etag), lambda f: shutil.copyfileobj(body, f, 1024 * 1024))
+        self._write_atomic(self._ref_path(bucket_name, s3_key), lambda f: f.write(etag.encode('utf-8')))
+        self._evict(keep=etag)
+        return self.open(etag)
+
+    def _evict(self, keep):
+        """Delete least recently used bodies until the budget is met, keeping the body just stored."""
+        with self._lock:
+            blobs = []
+            for entry in os.scandir(self.blobs_dir):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.is_file() and not entry.name.startswith("."):
+                    blobs.append((stat.st_mtime, stat.st_size, entry.name, entry.path))
+
+            keep = os.path.basename(self._blob_path(keep))
+            total = sum(size for _, size, _, _ in blobs)
+            for _, size, name, path in sorted(blobs):
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                try:
+                    os.unlink(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def nbytes(self):
+        """Return the bytes taken by the cached bodies."""
+        return sum(entry.stat().st_size for entry in os.scandir(self.blobs_dir) if entry.is_file())
@@ -0,0 +1,64 @@
+import streamlit as st
+from agreement import agreement_report
+from s3_client import LazyS3Client
+from validated_results import DEFAULT_MAX_WORKERS, load_results
+
+
+aws = st.secrets["aws"]
+
+# Shared with every rerun and session of this server, created on the first S3 request
+s3 = LazyS3Client(
+    aws_access_key_id=aws["AWS_ACCESS_KEY_ID"],
+    aws_secret_access_key=aws["AWS_SECRET_ACCESS_KEY"],
+    region_name=aws["AWS_REGION"],
+)
+
+bucket_name = aws["bucket_name"]
+prefix = aws["prefix"]
+
+
+def compute_report(kind):
+    """Download every labeler's validated results and compute their agreement report"""
+    try:
+        results = load_results(s3, bucket_name, prefix, kind, DEFAULT_MAX_WORKERS)
+        if results.empty:
+            st.error(f"❌ No validated {kind} results found in s3://{bucket_name}/{prefix}")
+            return None
+        return agreement_report(results)
+    except Exception as e:
+        st.error(f"❌ Error computing the agreement report: {str(e)}")
+        return None
+
+
+# Set page config
+st.set_page_config(
+    page_title="Annotator Agreement",
+    page_icon="🤝",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+st.title("Annotator Agreement")
+st.write("Agreement between the validated results pushed to S3 by each labeler (their latest upload).")
+
+kind = st.radio("Results", ["pairs", "triplets"], horizontal=True)
+if st.button("📈 Compute report"):
+    st.session_state.agreement_report = (kind, compute_report(kind))
+
+kind_computed, report = st.session_state.get("agreement_report", (None, None))
+if report is not None and kind_computed == kind:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Annotators", len(report["annotators"]))
+    col2.metric("Rows rated by several annotators", f"{report['shared_rows']} / {report['rows']}")
+    col3.metric("Fleiss' kappa", f"{report['fleiss_kappa']:.3f}")
+
+    st.subheader("Cohen's kappa by pair of annotators")
+    st.dataframe(report["cohen_kappa"].round(3))
+
+    st.subheader("Agreement by group")
+    st.caption("Share of agreeing annotator pairs and of rows with conflicting validations, least consistent groups first")
+    st.dataframe(report["groups"].round(3))
+
+    if report["labels"] is not None:
+        st.subheader("Disagreement by label")
+        st.dataframe(report["labels"].round(3))
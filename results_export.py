@@ -0,0 +1,245 @@
+import gzip
+import itertools
+import json
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from tracing import tracer
+
+
+DEFAULT_CHUNK_ROWS = 10000
+# S3 requires every part of a multipart upload but the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Key suffix and content type of each upload compression
+COMPRESSIONS = {
+    "none": (".json", "application/json"),
+    "gzip": (".json.gz", "application/gzip"),
+    "zstd": (".json.zst", "application/zstd"),
+}
+
+
+def iter_csv_chunks(df, validation_bits, only_validated=False, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield the CSV export of a dataset with its is_validated column, a block of rows at a time.
+
+    Only one block of rows is copied and formatted at a time, instead of copying the whole
+    DataFrame and rendering it to a single CSV string.
+
+    Args:
+        df (pd.DataFrame): The dataset rows
+        validation_bits (np.ndarray): One bool per row, True if the row is validated
+        only_validated (bool): Export only the validated rows
+        chunk_rows (int): Number of rows formatted per chunk
+
+    Yields:
+        bytes: UTF-8 encoded CSV, starting with the header line
+    """
+    header = True
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        bits = validation_bits[start:start + chunk_rows]
+        if only_validated:
+            chunk = chunk[bits]
+            bits = bits[bits]
+        yield chunk.assign(is_validated=bits).to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+class ExportCache:
+    """Export payloads built on demand and kept while the validation state is unchanged."""
+
+    def __init__(self):
+        # Version of the validation state the exports were requested for
+        self.version = None
+        self._payloads = {}
+
+    def request(self, version):
+        """Ask for exports of the given validation-state version."""
+        if version != self.version:
+            self._payloads.clear()
+            self.version = version
+
+    def is_current(self, version):
+        """
+        Return True if exports were requested for this validation-state version.
+
+        Exports of an older version are dropped, so stale payloads are not kept in memory.
+        """
+        if version != self.version:
+            self._payloads.clear()
+            return False
+        return True
+
+    def get(self, name, chunks):
+        """
+        Return an export, building it from a chunk generator on first use.
+
+        Args:
+            name (str): Identifies the export within the current version
+            chunks (callable): Returns an iterable of bytes chunks making up the export
+
+        Returns:
+            bytes: The export payload
+        """
+        if name not in self._payloads:
+            with tracer.span("csv_export", export=name) as span:
+                self._payloads[name] = b"".join(chunks())
+                span["bytes"] = len(self._payloads[name])
+        return self._payloads[name]
+
+
+def iter_validated_json_chunks(df, validation_bits, metadata, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield the validated-data JSON document a block of rows at a time.
+
+    The document has the same structure as the assembled datasets, {"data_deduplicated":
+    [...], "metadata": {...}}, written compactly (no indentation).
+
+    Args:
+        df (pd.DataFrame): The dataset rows
+        validation_bits (np.ndarray): One bool per row, True if the row is validated
+        metadata (dict): The metadata member of the document
+        chunk_rows (int): Number of rows serialized per chunk
+
+    Yields:
+        bytes: UTF-8 encoded JSON
+    """
+    yield b'{"data_deduplicated": ['
+    separator = ""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].assign(is_validated=validation_bits[start:start + chunk_rows])
+        records = chunk.to_json(orient="records", force_ascii=False, double_precision=15)[1:-1]
+        if records:
+            yield (separator + records).encode('utf-8')
+            separator = ", "
+    yield ('], "metadata": ' + json.dumps(metadata, ensure_ascii=False) + "}").encode('utf-8')
+
+
+def compress_chunks(chunks, compression="gzip"):
+    """
+    Compress a stream of byte chunks incrementally.
+
+    Args:
+        chunks (iterable): The bytes chunks to compress
+        compression (str): "gzip", "zstd" (requires the zstandard package) or "none"
+
+    Yields:
+        bytes: The compressed stream
+    """
+    if compression == "none":
+        yield from chunks
+        return
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    elif compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the zstandard package") from None
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def open_compressed(body, s3_key):
+    """
+    Wrap a response body so it reads decompressed, based on the compression suffix of its key.
+
+    Args:
+        body: A file-like object with a read(size) method, such as a boto3 StreamingBody
+        s3_key (str): The S3 key of the object, ending in .gz, .zst or neither
+
+    Returns:
+        A file-like object yielding the uncompressed bytes
+    """
+    if s3_key.endswith(".gz"):
+        return gzip.GzipFile(fileobj=body)
+    if s3_key.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires the zstandard package") from None
+        return zstandard.ZstdDecompressor().stream_reader(body)
+    return body
+
+
+def _iter_parts(chunks, part_size):
+    """Regroup a stream of byte chunks into parts of part_size bytes (the last may be smaller)."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def upload_multipart(s3, bucket_name, s3_key, chunks, part_size=DEFAULT_PART_SIZE,
+                     max_concurrency=DEFAULT_MAX_CONCURRENCY, **put_kwargs):
+    """
+    Upload a stream of byte chunks to S3, in parts sent concurrently.
+
+    At most max_concurrency parts are in flight, so memory stays bounded whatever the size
+    of the upload. A stream that fits in a single part is sent with one PUT instead.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        s3_key (str): The S3 key (path) to write
+        chunks (iterable): The bytes chunks of the object
+        part_size (int): Size of each part in bytes; raised to 5 MiB if smaller
+        max_concurrency (int): Maximum number of parts uploaded at the same time
+        **put_kwargs: Extra arguments for the upload, such as ContentType
+
+    Returns:
+        int: The number of bytes uploaded
+    """
+    # Smaller parts would be rejected with EntityTooSmall when the upload is completed
+    parts = _iter_parts(chunks, max(part_size, MIN_PART_SIZE))
+    first = next(parts, b"")
+    second = next(parts, None)
+    if second is None:
+        s3.put_object(Bucket=bucket_name, Key=s3_key, Body=first, **put_kwargs)
+        return len(first)
+
+    upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=s3_key, **put_kwargs)["UploadId"]
+
+    def upload_part(number, data):
+        response = s3.upload_part(
+            Bucket=bucket_name, Key=s3_key, UploadId=upload_id, PartNumber=number, Body=data
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    try:
+        completed = []
+        total = 0
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            in_flight = set()
+            for number, data in enumerate(itertools.chain([first, second], parts), start=1):
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    completed.extend(future.result() for future in done)
+                in_flight.add(pool.submit(upload_part, number, data))
+                total += len(data)
+            completed.extend(future.result() for future in in_flight)
+
+        s3.complete_multipart_upload(
+            Bucket=bucket_name,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(completed, key=lambda part: part["PartNumber"])},
+        )
+        return total
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket_name, Key=s3_key, UploadId=upload_id)
+        raise
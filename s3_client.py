@@ -0,0 +1,76 @@
+import os
+import threading
+
+
+# Connection pool size of the shared client; every session and worker thread draws from it
+MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+# Attempts per request, including the first one
+MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "5"))
+CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "60"))
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_config():
+    """Return the botocore configuration of the shared S3 clients."""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"mode": "adaptive", "total_max_attempts": MAX_ATTEMPTS},
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+    )
+
+
+def get_s3_client(aws_access_key_id=None, aws_secret_access_key=None, region_name=None):
+    """
+    Return the process-wide S3 client for a set of credentials, creating it on first use.
+
+    boto3 clients are thread-safe, so a single client (and its connection pool) is shared
+    by every script rerun, session and worker thread instead of one per caller.
+
+    Args:
+        aws_access_key_id (str, optional): The access key. If None, boto3's default
+            credential chain is used.
+        aws_secret_access_key (str, optional): The secret key
+        region_name (str, optional): The AWS region
+
+    Returns:
+        A boto3 S3 client
+    """
+    client_key = (aws_access_key_id, aws_secret_access_key, region_name)
+    client = _clients.get(client_key)
+    if client is None:
+        with _lock:
+            client = _clients.get(client_key)
+            if client is None:
+                # Imported here so processes that never reach S3 do not pay for boto3
+                import boto3
+
+                session = boto3.Session(
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    region_name=region_name,
+                )
+                client = session.client("s3", config=client_config())
+                _clients[client_key] = client
+    return client
+
+
+class LazyS3Client:
+    """Stands in for the shared S3 client of a set of credentials, creating it on first use."""
+
+    def __init__(self, **credentials):
+        """
+        Record the credentials without creating the client.
+
+        Args:
+            **credentials: The arguments of get_s3_client
+        """
+        self._credentials = credentials
+
+    def __getattr__(self, name):
+        return getattr(get_s3_client(**self._credentials), name)
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Seconds a cached listing is reused before S3 is listed again
+DEFAULT_LISTING_TTL = float(os.getenv("S3_LISTING_CACHE_TTL", "30"))
+DEFAULT_MAX_WORKERS = 8
+
+
+def _record(obj):
+    """Turn an entry of a ListObjectsV2 response into a listing record."""
+    return {
+        "key": obj["Key"],
+        "size": obj["Size"],
+        "etag": obj.get("ETag", "").strip('"'),
+        "last_modified": obj["LastModified"],
+    }
+
+
+def _iter_pages(s3, bucket_name, prefix, delimiter=None):
+    """Yield the ListObjectsV2 responses of a prefix, following continuation tokens."""
+    request = {"Bucket": bucket_name, "Prefix": prefix}
+    if delimiter:
+        request["Delimiter"] = delimiter
+    yield from s3.get_paginator("list_objects_v2").paginate(**request)
+
+
+def _list_prefix(s3, bucket_name, prefix):
+    """Return the records of every object under a prefix."""
+    return [_record(obj) for page in _iter_pages(s3, bucket_name, prefix) for obj in page.get("Contents", [])]
+
+
+def iter_objects(s3, bucket_name, prefix, parallel=False, max_workers=DEFAULT_MAX_WORKERS, recursive=True):
+    """
+    Yield a record for every object under a prefix, a page of results at a time.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        prefix (str): The prefix to list
+        parallel (bool): List the "/"-delimited sub-prefixes of prefix concurrently.
+            Objects are then yielded one sub-prefix at a time, in key order.
+        max_workers (int): Number of sub-prefixes listed at the same time
+        recursive (bool): If False, list only the objects directly under prefix, not
+            those under its "/"-delimited sub-prefixes
+
+    Yields:
+        dict: key, size, etag and last_modified of each object
+    """
+    if not parallel:
+        for page in _iter_pages(s3, bucket_name, prefix, delimiter=None if recursive else "/"):
+            for obj in page.get("Contents", []):
+                yield _record(obj)
+        return
+
+    sub_prefixes = []
+    for page in _iter_pages(s3, bucket_name, prefix, delimiter="/"):
+        for obj in page.get("Contents", []):
+            yield _record(obj)
+        sub_prefixes.extend(common["Prefix"] for common in page.get("CommonPrefixes", []))
+    if not recursive:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for records in pool.map(lambda sub_prefix: _list_prefix(s3, bucket_name, sub_prefix), sub_prefixes):
+            yield from records
+
+
+def list_keys(s3, bucket_name, prefix):
+    """Return every key under a prefix, in lexical order, following continuation tokens."""
+    return sorted(record["key"] for record in iter_objects(s3, bucket_name, prefix))
+
+
+class ListingCache:
+    """A short-lived cache of prefix listings, for repeated listings of the same prefix."""
+
+    def __init__(self, ttl=DEFAULT_LISTING_TTL):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl (float): Seconds a listing is reused before S3 is listed again
+        """
+        self.ttl = ttl
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def iter_objects(self, s3, bucket_name, prefix, parallel=False, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Yield the records of a prefix like iter_objects, from the cache while it is fresh.
+
+        A listing is cached only once it has been consumed to the end.
+        """
+        cache_key = (bucket_name, prefix)
+        with self._lock:
+            cached = self._listings.get(cache_key)
+        if cached is not None and time.monotonic() < cached[0]:
+            yield from cached[1]
+            return
+
+        records = []
+        for record in iter_objects(s3, bucket_name, prefix, parallel, max_workers):
+            records.append(record)
+            yield record
+        with self._lock:
+            self._listings[cache_key] = (time.monotonic() + self.ttl, records)
+
+    def invalidate(self, bucket_name, s3_key=None):
+        """Drop the cached listings of a bucket, or only those containing s3_key."""
+        with self._lock:
+            for cache_key in list(self._listings):
+                if cache_key[0] == bucket_name and (s3_key is None or s3_key.startswith(cache_key[1])):
+                    del self._listings[cache_key]
+
+
+# Shared by every S3Manager of the process
+listing_cache = ListingCache()
@@ -0,0 +1,185 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.s3.transfer import TransferConfig
+from rich import print
+
+from s3_listing import iter_objects
+
+
+DEFAULT_MAX_WORKERS = 8
+# Files above the threshold are transferred in parts of this size, several parts at a time
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=DEFAULT_PART_SIZE,
+    multipart_chunksize=DEFAULT_PART_SIZE,
+    max_concurrency=4,
+    use_threads=True,
+)
+_HASH_BLOCK_SIZE = 1024 * 1024
+_MIB = 1024 * 1024
+# Part sizes of the other uploaders: boto3's default (upload_file, the apps' pushes) and ours
+_COMMON_PART_SIZES = (8 * _MIB, DEFAULT_PART_SIZE)
+
+
+def local_etag(path, part_size=DEFAULT_PART_SIZE, parts=None):
+    """
+    Compute the ETag S3 gives a file uploaded from the local path.
+
+    A single-part upload's ETag is the MD5 of the content; a multipart upload's is the
+    MD5 of the concatenated part MD5s followed by "-<number of parts>".
+
+    Args:
+        path (str): The local file
+        part_size (int): The part size of a multipart upload
+        parts (int, optional): The number of parts of the multipart upload to match. If
+            None, the file is hashed as a single-part upload.
+
+    Returns:
+        str: The ETag, without quotes
+    """
+    if parts is None:
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                md5.update(block)
+        return md5.hexdigest()
+
+    part_digests = []
+    with open(path, "rb") as f:
+        for part in iter(lambda: f.read(part_size), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+def _candidate_part_sizes(size, parts, part_size):
+    """
+    Return the part sizes a multipart upload of size bytes in the given number of parts may have used.
+
+    The ETag only records the number of parts, so the candidates are the configured part
+    size, the common ones and the size implied by the number of parts rounded up to a whole
+    MiB, keeping those that split the file into that many parts.
+    """
+    implied = -(-size // parts)
+    implied = -(-implied // _MIB) * _MIB
+    candidates = dict.fromkeys((part_size, *_COMMON_PART_SIZES, implied))
+    return [candidate for candidate in candidates if -(-size // candidate) == parts]
+
+
+def is_unchanged(path, record, part_size=DEFAULT_PART_SIZE):
+    """
+    Return True if a local file has the same content as an S3 object.
+
+    Sizes are compared first, so only files of the same size are hashed. The ETag of a
+    multipart upload depends on its part size, so it is compared with the hash of each
+    part size the object may have been uploaded with.
+
+    Args:
+        path (str): The local file
+        record (dict): The listing record of the object (see s3_listing.iter_objects)
+        part_size (int): The part size multipart uploads are made with
+
+    Returns:
+        bool: True if the size and ETag match
+    """
+    if not os.path.isfile(path) or os.path.getsize(path) != record["size"]:
+        return False
+    etag = record["etag"]
+    if "-" not in etag:
+        return local_etag(path) == etag
+    parts = int(etag.rsplit("-", 1)[1])
+    return any(
+        local_etag(path, candidate, parts) == etag
+        for candidate in _candidate_part_sizes(record["size"], parts, part_size)
+    )
+
+
+def _transfer_all(transfers, max_workers):
+    """Run (transfer callable, description, size) tuples on a thread pool and count the outcomes."""
+    def run(transfer):
+        function, description, size = transfer
+        try:
+            function()
+            return size
+        except Exception as e:
+            print(f"❌ Error transferring {description}: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        sizes = list(pool.map(run, transfers))
+    done = [size for size in sizes if size is not None]
+    return {"transferred": len(done), "failed": len(sizes) - len(done), "bytes": sum(done)}
+
+
+def sync_up(s3, bucket_name, local_dir, prefix, max_workers=DEFAULT_MAX_WORKERS, config=TRANSFER_CONFIG):
+    """
+    Upload the files of a local directory that are missing or different under an S3 prefix.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        local_dir (str): The directory to upload, recursively
+        prefix (str): The S3 prefix mirroring local_dir
+        max_workers (int): Number of files transferred at the same time
+        config (TransferConfig): Multipart settings of each file transfer
+
+    Returns:
+        dict: Numbers of files transferred, skipped and failed, bytes transferred and the
+            uploaded keys
+    """
+    remote = {record["key"]: record for record in iter_objects(s3, bucket_name, prefix)}
+
+    transfers, keys, skipped = [], [], 0
+    for root, _, files in os.walk(local_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            s3_key = prefix + os.path.relpath(path, local_dir).replace(os.sep, "/")
+            record = remote.get(s3_key)
+            if record is not None and is_unchanged(path, record, config.multipart_chunksize):
+                skipped += 1
+                continue
+
+            def upload(path=path, s3_key=s3_key):
+                s3.upload_file(path, bucket_name, s3_key, Config=config)
+
+            transfers.append((upload, path, os.path.getsize(path)))
+            keys.append(s3_key)
+
+    summary = _transfer_all(transfers, max_workers)
+    return {**summary, "skipped": skipped, "keys": keys}
+
+
+def sync_down(s3, bucket_name, prefix, local_dir, max_workers=DEFAULT_MAX_WORKERS, config=TRANSFER_CONFIG):
+    """
+    Download the objects under an S3 prefix that are missing or different in a local directory.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        prefix (str): The S3 prefix to download, recursively
+        local_dir (str): The directory mirroring prefix
+        max_workers (int): Number of files transferred at the same time
+        config (TransferConfig): Multipart settings of each file transfer
+
+    Returns:
+        dict: Numbers of files transferred, skipped and failed and bytes transferred
+    """
+    transfers, skipped = [], 0
+    for record in iter_objects(s3, bucket_name, prefix):
+        relative = record["key"][len(prefix):]
+        if not relative or relative.endswith("/"):
+            continue
+        path = os.path.join(local_dir, *relative.split("/"))
+        if is_unchanged(path, record, config.multipart_chunksize):
+            skipped += 1
+            continue
+
+        def download(s3_key=record["key"], path=path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            s3.download_file(bucket_name, s3_key, path, Config=config)
+
+        transfers.append((download, record["key"], record["size"]))
+
+    summary = _transfer_all(transfers, max_workers)
+    return {**summary, "skipped": skipped}
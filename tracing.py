@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# Optional JSON-lines file every span is appended to, for offline analysis
+METRICS_FILE = os.getenv("METRICS_FILE")
+# Most recent durations kept per span for the percentiles
+DEFAULT_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+
+
+class TimedReader:
+    """Wraps a file-like body, adding up the time spent in read() and the bytes it returned."""
+
+    def __init__(self, body):
+        self.body = body
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def read(self, size=-1):
+        start = time.perf_counter()
+        data = self.body.read(size)
+        self.seconds += time.perf_counter() - start
+        self.bytes += len(data)
+        return data
+
+
+class Tracer:
+    """Timing spans of the hot paths, kept in memory for percentiles and optionally appended to a file."""
+
+    def __init__(self, metrics_file=None, window=DEFAULT_WINDOW):
+        """
+        Initialize a tracer without any span.
+
+        Args:
+            metrics_file (str, optional): Appends every span to this file as a JSON line
+            window (int): Number of most recent durations kept per span name
+        """
+        self.metrics_file = metrics_file
+        self.window = window
+        self._durations = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time the enclosed block and record it as a span.
+
+        The attributes dict is yielded, so values known only inside the block (rows,
+        bytes) can be added to it. An exception is recorded in the `error` attribute
+        and raised again.
+
+        Args:
+            name (str): The span name, such as "s3_get" or "page_render"
+            **attributes: Written with the span, such as the S3 key or the number of rows
+        """
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, **attributes)
+
+    def record(self, name, seconds, **attributes):
+        """
+        Record a span measured by the caller.
+
+        Args:
+            name (str): The span name
+            seconds (float): Its duration
+            **attributes: Written with the span
+        """
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.window)
+            durations.append(seconds)
+            if self.metrics_file:
+                line = {"time": time.time(), "span": name, "seconds": round(seconds, 6), **attributes}
+                with open(self.metrics_file, "a") as f:
+                    f.write(json.dumps(line, default=str) + "\n")
+
+    def percentiles(self):
+        """
+        Return the duration percentiles of every span over its recent window.
+
+        Returns:
+            list: One dict per span name with its count and the p50, p90, p99 and max
+                durations in milliseconds
+        """
+        # Imported on first use, so recording spans does not load numpy
+        import numpy as np
+
+        with self._lock:
+            durations = {name: np.array(values) for name, values in self._durations.items()}
+        report = []
+        for name, values in sorted(durations.items()):
+            p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000
+            report.append({
+                "span": name,
+                "count": len(values),
+                "p50_ms": round(p50, 1),
+                "p90_ms": round(p90, 1),
+                "p99_ms": round(p99, 1),
+                "max_ms": round(values.max() * 1000, 1),
+            })
+        return report
+
+    def clear(self):
+        """Drop the recorded durations (the metrics file is kept)."""
+        with self._lock:
+            self._durations.clear()
+
+
+# Imported modules are shared by every Streamlit session, so this instance is process-wide
+tracer = Tracer(metrics_file=METRICS_FILE)
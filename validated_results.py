@@ -0,0 +1,155 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from dataset_io import PAIRS_COLUMNS, TRIPLETS_COLUMNS, load_frame
+from results_export import COMPRESSIONS, open_compressed
+from s3_listing import iter_objects
+
+
+# File name prefix and dataset columns of the validated results uploaded by each app
+RESULT_KINDS = {
+    "pairs": ("validated_data_pairs_", PAIRS_COLUMNS),
+    "triplets": ("validated_data_", TRIPLETS_COLUMNS),
+}
+
+CONFLICT_POLICIES = ("latest", "majority", "unanimous")
+DEFAULT_MAX_WORKERS = 8
+
+_ANONYMOUS_SUFFIX = " (anonymous)"
+
+
+def parse_result_key(s3_key, kind="pairs"):
+    """
+    Return the labeler and upload time encoded in the name of a validated-results object.
+
+    Names look like `validated_data_pairs_<user>_<timestamp>.json[.gz|.zst]`, or
+    `validated_data_pairs_<timestamp> (anonymous).json[.gz|.zst]` for anonymous uploads.
+
+    Args:
+        s3_key (str): The S3 key of the object
+        kind (str): "pairs" or "triplets"
+
+    Returns:
+        tuple: (user, timestamp), or None if the key is not a result of this kind
+    """
+    name_prefix, _ = RESULT_KINDS[kind]
+    name = os.path.basename(s3_key)
+    if not name.startswith(name_prefix) or (kind == "triplets" and name.startswith(RESULT_KINDS["pairs"][0])):
+        return None
+
+    stem = name[len(name_prefix):]
+    for extension, _ in sorted(COMPRESSIONS.values(), key=lambda entry: -len(entry[0])):
+        if stem.endswith(extension):
+            stem = stem[:-len(extension)]
+            break
+    else:
+        return None
+
+    if stem.endswith(_ANONYMOUS_SUFFIX):
+        user, timestamp = "anonymous", stem[:-len(_ANONYMOUS_SUFFIX)]
+    elif "_" in stem:
+        user, timestamp = stem.rsplit("_", 1)
+    else:
+        return None
+    try:
+        return user, pd.Timestamp(timestamp)
+    except ValueError:
+        return None
+
+
+def list_result_keys(s3, bucket_name, prefix, kind="pairs"):
+    """Return the keys of every validated-results object of one kind directly under a prefix."""
+    return sorted(
+        record["key"] for record in iter_objects(s3, bucket_name, prefix, recursive=False)
+        if parse_result_key(record["key"], kind)
+    )
+
+
+def load_result(s3, bucket_name, s3_key, kind="pairs"):
+    """
+    Download one validated-results object into a DataFrame.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        s3_key (str): The S3 key of the object
+        kind (str): "pairs" or "triplets"
+
+    Returns:
+        pd.DataFrame: The dataset columns and is_validated of every row, plus the user,
+            upload timestamp and source key of the snapshot
+    """
+    user, timestamp = parse_result_key(s3_key, kind)
+    _, columns = RESULT_KINDS[kind]
+    response = s3.get_object(Bucket=bucket_name, Key=s3_key)
+    df = load_frame(open_compressed(response['Body'], s3_key), columns + ["is_validated"])
+    df["is_validated"] = df["is_validated"].astype(bool)
+    return df.assign(user=user, timestamp=timestamp, source=s3_key)
+
+
+def load_results(s3, bucket_name, prefix, kind="pairs", max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Download every validated-results object of one kind under a prefix, concurrently.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        prefix (str): The prefix holding the results
+        kind (str): "pairs" or "triplets"
+        max_workers (int): Number of objects downloaded and parsed at the same time
+
+    Returns:
+        pd.DataFrame: The rows of every snapshot (see load_result), empty if there is none
+    """
+    keys = list_result_keys(s3, bucket_name, prefix, kind)
+    if not keys:
+        _, columns = RESULT_KINDS[kind]
+        return pd.DataFrame(columns=columns + ["is_validated", "user", "timestamp", "source"])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(lambda s3_key: load_result(s3, bucket_name, s3_key, kind), keys))
+    return pd.concat(frames, ignore_index=True)
+
+
+def latest_votes(results):
+    """Keep only the most recent snapshot of each labeler: one vote per row and labeler."""
+    return results.sort_values("timestamp", kind="stable").drop_duplicates(["id", "user"], keep="last")
+
+
+def merge_results(results, policy="latest"):
+    """
+    Join validated-results snapshots by id into one labeled dataset.
+
+    Every labeler's latest snapshot casts one vote per row. Conflicting votes are resolved
+    by the policy:
+        - latest: the most recent snapshot containing the row wins
+        - majority: validated if more than half of the labelers validated it
+        - unanimous: validated only if every labeler validated it
+
+    Args:
+        results (pd.DataFrame): Snapshot rows, as returned by load_results
+        policy (str): One of CONFLICT_POLICIES
+
+    Returns:
+        pd.DataFrame: One row per id, sorted by id, with the dataset columns of the most
+            recent snapshot, is_validated, and the number of validated votes and labelers
+    """
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy: {policy}")
+
+    votes = latest_votes(results)
+    tally = votes.groupby("id", sort=True)["is_validated"].agg(votes="sum", annotators="count")
+
+    latest = votes.drop_duplicates("id", keep="last").set_index("id")
+    merged = latest.drop(columns=["is_validated", "user", "timestamp", "source"]).loc[tally.index]
+    if policy == "latest":
+        merged["is_validated"] = latest.loc[tally.index, "is_validated"]
+    elif policy == "majority":
+        merged["is_validated"] = tally["votes"] * 2 > tally["annotators"]
+    else:
+        merged["is_validated"] = tally["votes"] == tally["annotators"]
+    merged["votes"] = tally["votes"].astype("int32")
+    merged["annotators"] = tally["annotators"].astype("int32")
+    return merged.reset_index()
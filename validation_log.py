@@ -0,0 +1,155 @@
+import json
+import time
+import uuid
+
+import pandas as pd
+from rich import print
+
+from s3_listing import list_keys
+
+
+# Delta objects folded into the snapshot after this many autosaves
+COMPACT_EVERY = 50
+
+SNAPSHOT_NAME = "snapshot.json"
+DELTAS_DIR = "deltas/"
+
+
+def _plain(value):
+    """Convert a NumPy scalar into the equivalent Python value for JSON serialization."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def log_prefix(prefix, dataset_name, username):
+    """Return the S3 prefix holding one labeler's validation log for one dataset."""
+    return f"{prefix}validation_log/{dataset_name}/{username}/"
+
+
+class ValidationLog:
+    """
+    A labeler's validation changes, saved to S3 as an append-only log of small delta objects.
+
+    Each autosave PUTs only the rows changed since the previous one as a JSONL object under
+    `<log prefix>deltas/`, named by timestamp so keys sort in write order. Compaction folds
+    the deltas into `<log prefix>snapshot.json` and deletes them.
+    """
+
+    def __init__(self, s3, bucket_name, prefix, username):
+        """
+        Initialize an empty log.
+
+        Args:
+            s3: A boto3 S3 client
+            bucket_name (str): The S3 bucket name
+            prefix (str): The log prefix, see log_prefix()
+            username (str): The labeler recorded in every delta
+        """
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.username = username
+        self.pending = {}
+        self.saves = 0
+        self.last_saved = None
+
+    def record(self, row_id, is_validated):
+        """Record a validation change; only the latest change of a row is kept until the next save."""
+        row_id = _plain(row_id)
+        self.pending[row_id] = {
+            "id": row_id,
+            "is_validated": bool(is_validated),
+            "user": self.username,
+            "ts": time.time(),
+        }
+
+    def flush(self):
+        """
+        Append the pending changes to S3 as one delta object.
+
+        Returns:
+            int: The number of changes saved (0 if there was nothing to save)
+        """
+        if not self.pending:
+            return 0
+
+        deltas = list(self.pending.values())
+        body = "".join(json.dumps(delta, ensure_ascii=False) + "\n" for delta in deltas)
+        s3_key = f"{self.prefix}{DELTAS_DIR}{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.jsonl"
+        self.s3.put_object(Bucket=self.bucket_name, Key=s3_key, Body=body.encode('utf-8'))
+
+        self.pending.clear()
+        self.saves += 1
+        self.last_saved = pd.Timestamp.now()
+        if self.saves % COMPACT_EVERY == 0:
+            compact_log(self.s3, self.bucket_name, self.prefix)
+        return len(deltas)
+
+    def load(self):
+        """
+        Return the saved validations: the snapshot with the later deltas applied.
+
+        Returns:
+            dict: The latest delta record of every row, by row id
+        """
+        validations, _ = _read_log(self.s3, self.bucket_name, self.prefix)
+        return validations
+
+
+def _read_log(s3, bucket_name, prefix):
+    """Return the folded validations of a log and the delta keys that were folded."""
+    validations = {}
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=f"{prefix}{SNAPSHOT_NAME}")
+        for record in json.loads(response['Body'].read().decode('utf-8'))["validations"]:
+            validations[record["id"]] = record
+    except s3.exceptions.NoSuchKey:
+        pass
+
+    delta_keys = list_keys(s3, bucket_name, f"{prefix}{DELTAS_DIR}")
+    for s3_key in delta_keys:
+        response = s3.get_object(Bucket=bucket_name, Key=s3_key)
+        for line in response['Body'].read().decode('utf-8').splitlines():
+            if line.strip():
+                record = json.loads(line)
+                previous = validations.get(record["id"])
+                if previous is None or record["ts"] >= previous["ts"]:
+                    validations[record["id"]] = record
+    return validations, delta_keys
+
+
+def compact_log(s3, bucket_name, prefix):
+    """
+    Fold the delta objects of a validation log into its snapshot and delete them.
+
+    Deltas appended while the compaction runs are not listed, so they are kept and folded
+    by the next compaction.
+
+    Args:
+        s3: A boto3 S3 client
+        bucket_name (str): The S3 bucket name
+        prefix (str): The log prefix, see log_prefix()
+
+    Returns:
+        int: The number of delta objects folded
+    """
+    validations, delta_keys = _read_log(s3, bucket_name, prefix)
+    if not delta_keys:
+        return 0
+
+    snapshot = {
+        "validations": list(validations.values()),
+        "compacted_at": pd.Timestamp.now().isoformat(),
+    }
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=f"{prefix}{SNAPSHOT_NAME}",
+        Body=json.dumps(snapshot, ensure_ascii=False).encode('utf-8'),
+    )
+    # DeleteObjects accepts at most 1000 keys per request
+    for start in range(0, len(delta_keys), 1000):
+        s3.delete_objects(
+            Bucket=bucket_name,
+            Delete={"Objects": [{"Key": s3_key} for s3_key in delta_keys[start:start + 1000]], "Quiet": True},
+        )
+    print(f"✅ Compacted {len(delta_keys)} delta objects into s3://{bucket_name}/{prefix}{SNAPSHOT_NAME}")
+    return len(delta_keys)
@@ -0,0 +1,174 @@
+import weakref
+
+import numpy as np
+
+
+# Validation states of the live sessions, by session id, for the admin overlay readout
+session_states = weakref.WeakValueDictionary()
+
+
+class ValidationState:
+    """
+    Per-row validation flags with running counters, stored as a sparse overlay.
+
+    Every row starts as not validated and only the validated rows are recorded, as a
+    sorted array of row numbers, so a session costs memory in proportion to its edits
+    rather than to the dataset size. Once that array would take more memory than a packed
+    bitset of the dataset (one bit per row), it is folded into one.
+    """
+
+    def __init__(self, size):
+        """
+        Initialize every row as not validated.
+
+        Args:
+            size (int): Number of rows in the dataset
+        """
+        self.size = size
+        # Sorted validated rows, until folded into the packed bitset
+        self.overlay = np.array([], dtype=np.int64)
+        self._packed = None
+        self.validated_count = 0
+        # Incremented on every change, so derived data can be cached against it
+        self.version = 0
+        # Shared group code of every row and validated rows per group (see track_groups)
+        self.group_codes = None
+        self.group_counts = None
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        if self._packed is not None:
+            return bool(self._packed[idx >> 3] & (0x80 >> (idx & 7)))
+        position = np.searchsorted(self.overlay, idx)
+        return bool(position < len(self.overlay) and self.overlay[position] == idx)
+
+    def set(self, idx, value):
+        """
+        Set the validation flag of one row, updating the counters in O(1).
+
+        Args:
+            idx (int): The row index
+            value (bool): True if the row is validated
+
+        Returns:
+            bool: True if the flag changed
+        """
+        value = bool(value)
+        if self[idx] == value:
+            return False
+
+        if self._packed is not None:
+            self._packed[idx >> 3] ^= 0x80 >> (idx & 7)
+        elif value:
+            self.overlay = np.insert(self.overlay, np.searchsorted(self.overlay, idx), idx)
+            if self.overlay.nbytes > (self.size + 7) // 8:
+                self._fold()
+        else:
+            self.overlay = np.delete(self.overlay, np.searchsorted(self.overlay, idx))
+
+        self.validated_count += 1 if value else -1
+        if self.group_codes is not None and self.group_codes[idx] >= 0:
+            self.group_counts[self.group_codes[idx]] += 1 if value else -1
+        self.version += 1
+        return True
+
+    def _fold(self):
+        """Move the overlay into a packed bitset of every row."""
+        packed = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        np.bitwise_or.at(packed, self.overlay >> 3, (0x80 >> (self.overlay & 7)).astype(np.uint8))
+        self._packed = packed
+        self.overlay = np.array([], dtype=np.int64)
+
+    @property
+    def bits(self):
+        """The flags of every row as a new bool array, for exports."""
+        if self._packed is not None:
+            return np.unpackbits(self._packed, count=self.size).astype(bool)
+        bits = np.zeros(self.size, dtype=bool)
+        bits[self.overlay] = True
+        return bits
+
+    def track_groups(self, group_codes, num_groups):
+        """
+        Keep a validated-row counter per group, updated by set() in O(1).
+
+        Args:
+            group_codes (np.ndarray): Shared read-only group code of every row, in
+                [0, num_groups) or -1 for rows without a group
+            num_groups (int): Number of groups
+        """
+        rows = self.overlay if self._packed is None else np.flatnonzero(self.bits)
+        codes = group_codes[rows]
+        self.group_counts = np.bincount(codes[codes >= 0], minlength=num_groups).astype(np.int64)
+        self.group_codes = group_codes
+
+    @property
+    def remaining_count(self):
+        return self.size - self.validated_count
+
+    @property
+    def nbytes(self):
+        """Memory owned by this session, excluding the shared group codes."""
+        packed_bytes = self._packed.nbytes if self._packed is not None else 0
+        group_bytes = self.group_counts.nbytes if self.group_counts is not None else 0
+        return self.overlay.nbytes + packed_bytes + group_bytes
+
+    def count(self, start, end):
+        """Return the number of validated rows in [start, end), scanning only that slice."""
+        end = min(end, self.size)
+        if start >= end:
+            return 0
+        if self._packed is None:
+            return int(np.searchsorted(self.overlay, end) - np.searchsorted(self.overlay, start))
+        # Unpack only the bytes covering the slice
+        first = start >> 3
+        bits = np.unpackbits(self._packed[first:(end + 7) >> 3])
+        return int(np.count_nonzero(bits[start - first * 8:end - first * 8]))
+
+    def to_bytes(self):
+        """Serialize the flags as a packed bitset (one bit per row)."""
+        if self._packed is not None:
+            return self._packed.tobytes()
+        return np.packbits(self.bits).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, size):
+        """
+        Restore a state serialized with to_bytes.
+
+        Args:
+            data (bytes): The packed bitset
+            size (int): Number of rows in the dataset
+
+        Returns:
+            ValidationState: The restored state
+        """
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=size).astype(bool)
+        state = cls(size)
+        state.overlay = np.flatnonzero(bits).astype(np.int64)
+        state.validated_count = len(state.overlay)
+        if state.overlay.nbytes > (size + 7) // 8:
+            state._fold()
+        return state
+
+
+def overlay_report():
+    """
+    Describe the validation overlays of the live sessions.
+
+    Returns:
+        list: One dict per session with its id, rows, validated rows, whether the overlay
+            was folded into a packed bitset and the bytes it owns
+    """
+    return [
+        {
+            "session": session_id[:8],
+            "rows": state.size,
+            "validated": state.validated_count,
+            "packed_bitset": state._packed is not None,
+            "bytes": state.nbytes,
+        }
+        for session_id, state in list(session_states.items())
+    ]